@@ -0,0 +1,148 @@
+import sys
+import json
+import logging
+import argparse
+from typing import Dict, List, Optional
+
+from mock_signup import MockSignupServer
+from generator import UsernameGenerator
+from gmail_hunter import BrowserManager, GmailRegistration, GmailChecker
+from cli import setup_logging
+from metrics import metrics, KIND_STAGE
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """计算耗时分布：次数、均值、最小、p50/p90/p95、最大（秒）"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        index = (len(ordered) - 1) * p
+        low = int(index)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "min": round(ordered[0], 4),
+        "p50": round(percentile(0.5), 4),
+        "p90": round(percentile(0.9), 4),
+        "p95": round(percentile(0.95), 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+class Benchmark:
+    """在本地模拟注册页上测量注册流程各阶段和单个用户名检查的耗时
+
+    注册流程与正式运行走同一个 init_registration，各阶段耗时取自 metrics 的 span：
+    setup 为整个注册流程（含进入用户名页面），setup.* 为其中各步骤，check 为单个用户名检查。
+    """
+    def __init__(self, server: MockSignupServer, headless: bool = True,
+                 random_delay: bool = False, seed: Optional[int] = None):
+        self.server = server
+        self.headless = headless
+        # 默认跳过检查前的随机延迟，否则单个用户名的耗时主要由随机数决定
+        self.random_delay = GmailChecker.RANDOM_DELAY if random_delay else None
+        self.seed = seed
+        self.samples: Dict[str, List[float]] = {}
+
+    def _observe(self, stage: str, kind: str, seconds: float) -> None:
+        if kind == KIND_STAGE:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def run(self, usernames: List[str], rounds: int = 1) -> Dict[str, Dict[str, float]]:
+        checker = GmailChecker(headless=self.headless, random_delay=self.random_delay, seed=self.seed)
+        metrics.observers.append(self._observe)
+        try:
+            for round_no in range(1, rounds + 1):
+                logging.info(f"⏱️ 第 {round_no}/{rounds} 轮")
+                with BrowserManager(self.headless) as page:
+                    GmailRegistration.init_registration(page, self.server.signup_url)
+                    for username in usernames:
+                        result = checker._check_single_username(page, username)
+                        self.samples.setdefault(f"check.{result.outcome.label}", []).append(
+                            self.samples["check"][-1])
+        finally:
+            metrics.observers.remove(self._observe)
+        return {stage: summarize(samples) for stage, samples in sorted(self.samples.items())}
+
+
+def print_report(report: Dict[str, Dict[str, float]]) -> None:
+    print("\n" + "-" * 78)
+    print(f"{'阶段':<24}{'次数':>6}{'均值':>8}{'最小':>8}{'p50':>8}{'p90':>8}{'p95':>8}{'最大':>8}")
+    for stage, stats in report.items():
+        if not stats["count"]:
+            continue
+        print(f"{stage:<24}{stats['count']:>6}" + "".join(
+            f"{stats[k]:>8.3f}" for k in ("mean", "min", "p50", "p90", "p95", "max")))
+    print("-" * 78)
+
+
+def compare_with_baseline(report: Dict[str, Dict[str, float]], baseline_path: str,
+                          tolerance: float, min_delta: float = 0.1) -> List[str]:
+    """与基线比较各阶段 p50，返回超出容差的阶段说明
+
+    p50 同时超出相对容差和绝对下限 min_delta（秒）才算回退，
+    避免几十毫秒的快速阶段因正常抖动而误报。
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = []
+    for stage, stats in report.items():
+        base = baseline.get(stage, {}).get("p50")
+        p50 = stats.get("p50", 0)
+        if base and p50 > base * (1 + tolerance) and p50 - base > min_delta:
+            regressions.append(f"{stage}: p50 {p50:.3f}s > 基线 {base:.3f}s × {1 + tolerance:g}"
+                               f" (+{p50 - base:.3f}s)")
+    return regressions
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Gmail 用户名检查离线基准测试')
+    parser.add_argument('-n', '--names', type=int, default=10, help='每轮检查的用户名数量 (默认: 10)')
+    parser.add_argument('-r', '--rounds', type=int, default=1, help='重复轮数，每轮重新走一遍注册流程 (默认: 1)')
+    parser.add_argument('--taken-every', type=int, default=2,
+                        help='每隔几个用户名设为已占用，0 表示全部可用 (默认: 2)')
+    parser.add_argument('--page-latency', type=float, default=0.0, help='页面的服务端延迟（秒）')
+    parser.add_argument('--check-latency', type=float, default=0.0, help='用户名检查的服务端延迟（秒）')
+    parser.add_argument('--headed', action='store_true', help='显示浏览器窗口')
+    parser.add_argument('--json', dest='json_file', help='把统计结果保存为 JSON 文件')
+    parser.add_argument('--baseline', help='基线 JSON 文件，p50 超出容差时以非零状态退出')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='相对基线的容差 (默认: 0.25)')
+    parser.add_argument('--min-delta', type=float, default=0.1,
+                        help='判定回退所需的最小绝对增量（秒），低于此值的变化视为抖动 (默认: 0.1)')
+    parser.add_argument('--random-delay', action='store_true',
+                        help='保留检查前的随机延迟（默认跳过，使结果可比）')
+    parser.add_argument('--seed', type=int, default=None, help='随机延迟的随机种子')
+    args = parser.parse_args()
+    setup_logging()
+
+    usernames = UsernameGenerator().generate_usernames(args.names, ranked=True)
+    taken = usernames[::args.taken_every] if args.taken_every else []
+    with MockSignupServer(page_latency=args.page_latency, check_latency=args.check_latency,
+                          taken=taken) as server:
+        report = Benchmark(server, headless=not args.headed, random_delay=args.random_delay,
+                           seed=args.seed).run(usernames, args.rounds)
+
+    print_report(report)
+    metrics.log_summary()
+    if args.json_file:
+        with open(args.json_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 统计结果已保存到: {args.json_file}")
+    if args.baseline:
+        regressions = compare_with_baseline(report, args.baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print("❌ 性能回退:")
+            for line in regressions:
+                print(f"- {line}")
+            sys.exit(1)
+        print("✅ 未发现性能回退")
+
+
+if __name__ == "__main__":
+    main()
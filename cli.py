@@ -0,0 +1,113 @@
+import sys
+import argparse
+from typing import List, Optional
+
+from config import DEFAULT_DB_PATH, DEFAULT_TTL_HOURS
+from outcome import Outcome
+
+# 各子命令的实现在处理函数内才导入：query、generate 不会加载 Playwright、InquirerPy 和 sqlite3，
+# 在脚本中循环调用时启动开销接近解释器本身
+
+
+def setup_logging():
+    """配置日志"""
+    import logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+
+def _check(args) -> int:
+    from gmail_hunter import run
+    setup_logging()
+    run(args)
+    return 0
+
+
+def _generate(args) -> int:
+    from generator import run
+    return run(args)
+
+
+def _query(args) -> int:
+    from history import run_query
+    return run_query(args)
+
+
+def _import(args) -> int:
+    from history import run_import
+    setup_logging()
+    return run_import(args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Gmail 用户名工具：检查、生成、查询结果、导入历史')
+    subparsers = parser.add_subparsers(dest='command', required=True, metavar='COMMAND')
+
+    check = subparsers.add_parser('check', help='检查用户名可用性（启动浏览器）',
+                                  description='Gmail 用户名可用性检查工具')
+    check.add_argument('username', nargs='?', help='要检查的用户名')
+    check.add_argument('-f', '--file', help='包含用户名列表的文件路径')
+    check.add_argument('--headless', action='store_true', help='使用无头模式')
+    check.add_argument('--db', default=DEFAULT_DB_PATH,
+                       help=f'结果数据库路径 (默认: {DEFAULT_DB_PATH})')
+    check.add_argument('--ttl', type=float, default=DEFAULT_TTL_HOURS,
+                       help=f'历史结果有效期，单位小时，过期后重新检查 (默认: {DEFAULT_TTL_HOURS:g})')
+    check.add_argument('--no-cache', action='store_true', help='不读写结果数据库')
+    check.add_argument('-p', '--pipeline', action='store_true',
+                       help='流水线模式：直接从用户名生成器按评分顺序取候选并检查')
+    check.add_argument('-t', '--target', type=int, default=None,
+                       help='找到指定数量的可用用户名后停止 (流水线模式默认: 5)')
+    check.add_argument('--random', action='store_true',
+                       help='流水线模式下随机顺序取候选，不按评分优先')
+    check.add_argument('--seed', type=int, default=None, help='流水线随机顺序的随机种子')
+    check.add_argument('--retries', type=int, default=2,
+                       help='单个用户名检查出错时恢复会话并重试的次数 (默认: 2)')
+    check.add_argument('--prom-file', help='把分阶段耗时直方图写入 Prometheus textfile')
+    check.add_argument('--resume', nargs='?', const='latest', metavar='LOG',
+                       help='从已有的结果日志 (results_*.jsonl) 继续检查，默认使用最近一次的日志')
+    check.set_defaults(handler=_check)
+
+    generate = subparsers.add_parser('generate', help='生成候选用户名', description='Gmail用户名生成器')
+    generate.add_argument('-n', '--number', type=int, default=100,
+                          help='要生成的用户名数量 (默认: 100)')
+    generate.add_argument('-s', '--seed', type=int, default=None,
+                          help='随机种子，指定后结果可复现（仅用于 --random）')
+    generate.add_argument('--random', action='store_true',
+                          help='随机抽样生成，不按评分优先输出')
+    generate.add_argument('--stdout', action='store_true',
+                          help='每行输出一个用户名到标准输出，不保存文件')
+    generate.set_defaults(handler=_generate)
+
+    query = subparsers.add_parser('query', help='查询已保存的检查结果（不启动浏览器）',
+                                  description='查询结果库中每个用户名最近一次的结果')
+    query.add_argument('usernames', nargs='*', help='要查询的用户名，有用户名没有记录时退出码为 1')
+    query.add_argument('-o', '--outcome', action='append',
+                       choices=[o.label for o in Outcome],
+                       help='列出指定结果类型的用户名，可重复指定')
+    query.add_argument('--db', default=DEFAULT_DB_PATH,
+                       help=f'结果数据库路径 (默认: {DEFAULT_DB_PATH})')
+    query.set_defaults(handler=_query)
+
+    import_ = subparsers.add_parser('import', help='导入 result/ 目录下的历史结果文件',
+                                    description='把历史结果文件导入结果库，重复运行只处理新文件')
+    import_.add_argument('directory', nargs='?', default='result', help='结果目录 (默认: result)')
+    import_.add_argument('--db', default=DEFAULT_DB_PATH,
+                         help=f'结果数据库路径 (默认: {DEFAULT_DB_PATH})')
+    import_.set_defaults(handler=_import)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """主函数"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'check' and args.pipeline and (args.file or args.username):
+        parser.error("check: --pipeline 从生成器取候选，不能与 -f/--file 或用户名同时使用")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
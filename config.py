@@ -0,0 +1,5 @@
+import os
+
+# 各模块共用的默认值。本模块不依赖其他模块，cli.py 生成帮助信息时无需导入 sqlite3 等实现模块
+DEFAULT_DB_PATH = os.path.join('result', 'results.db')
+DEFAULT_TTL_HOURS = 24.0
@@ -1,66 +1,128 @@
 import random
-from typing import List
+import math
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import os
-import argparse
+import sys
+
+# 候选来源：(用户名, 前词类别, 后词类别, 截断掉的字符数)，单独成词的类别为 'single'
+Source = Tuple[str, str, str, int]
+
+class UsernameScorer:
+    """候选用户名评分 - 综合长度、可读性、字母重复和词语搭配，分数越高越优先"""
+    VOWELS = 'aeiouy'
+    # 前后词类别搭配加分，未列出的搭配不加分
+    PAIR_BONUS = {
+        ('color', 'animal'): 1.0, ('color', 'nature'): 1.0,
+        ('trait', 'animal'): 1.0, ('trait', 'nature'): 0.8, ('trait', 'thing'): 0.5,
+        ('nature', 'animal'): 0.8, ('nature', 'nature'): 0.5, ('nature', 'place'): 0.5,
+        ('gem', 'animal'): 0.8, ('gem', 'nature'): 0.5,
+        ('animal', 'place'): 0.5, ('tech', 'thing'): 0.5, ('thing', 'place'): 0.3,
+        ('single', 'single'): 1.0,
+    }
+    
+    def __init__(self):
+        letters = 'abcdefghijklmnopqrstuvwxyz'
+        # 把用户名映射成元音/辅音模式串，例如 foxowl -> cvcvcc
+        self._pattern_table = str.maketrans(
+            letters, ''.join('v' if c in self.VOWELS else 'c' for c in letters))
+        self._clusters = re.compile(r'c{3,}|v{3,}')
+        self._doubles = re.compile(r'(.)\1')
+
+    def score(self, username: str, first_category: str = 'single',
+              second_category: str = 'single', cut: int = 0) -> float:
+        """计算单个候选用户名的分数"""
+        return self.score_all([(username, first_category, second_category, cut)])[0]
+
+    def score_all(self, sources: Iterable[Source]) -> List[float]:
+        """一次遍历为所有候选用户名打分"""
+        table = self._pattern_table
+        clusters = self._clusters.findall
+        doubles = self._doubles.findall
+        pair_bonus = self.PAIR_BONUS
+        scores = []
+        for username, first_category, second_category, cut in sources:
+            length = len(username)
+            pattern = username.translate(table)
+            # 长度：越短越好
+            score = 1.0 if length <= 6 else 0.5
+            # 完整保留原词更易读，每截掉一个字母扣分
+            score += 2.0 if cut == 0 else -0.5 * cut
+            # 可读性：元音辅音交替越多越好，连续 3 个以上辅音/元音扣分
+            transitions = sum(1 for a, b in zip(pattern, pattern[1:]) if a != b)
+            score += transitions / (length - 1) if length > 1 else 0.0
+            score -= 0.7 * sum(len(c) - 2 for c in clusters(pattern))
+            # 字母重复：相邻重复字母扣分，不同字母占比越高越好
+            score -= 0.3 * len(doubles(username))
+            score += len(set(username)) / length if length else 0.0
+            # 词语搭配
+            score += pair_bonus.get((first_category, second_category), 0.0)
+            scores.append(round(score, 4))
+        return scores
 
 class UsernameGenerator:
     """用户名生成器 - 生成高质量、易读的用户名"""
+    MIN_LENGTH = 6
+    MAX_LENGTH = 7
     
     def __init__(self):
-        # 第一组词（放在前面）
-        self.first_words = [
+        # 第一组词（放在前面），按类别分组，类别用于评分时的搭配判断
+        self.first_word_groups = {
             # 颜色
-            'blue', 'red', 'gold', 'jade', 'ruby', 'cyan', 'pink', 'rose',
-            'gray', 'mint', 'lime', 'rust', 'wine',
+            'color': ['blue', 'red', 'gold', 'jade', 'ruby', 'cyan', 'pink', 'rose',
+                      'gray', 'mint', 'lime', 'rust', 'wine'],
             
             # 自然元素
-            'sky', 'sun', 'moon', 'star', 'snow', 'rain', 'wind', 'leaf',
-            'ice', 'fire', 'sand', 'rock', 'wood', 'tree', 'seed', 'dawn',
-            'dusk', 'mist', 'fog', 'dust', 'wave', 'lake', 'sea', 'bay',
+            'nature': ['sky', 'sun', 'moon', 'star', 'snow', 'rain', 'wind', 'leaf',
+                       'ice', 'fire', 'sand', 'rock', 'wood', 'tree', 'seed', 'dawn',
+                       'dusk', 'mist', 'fog', 'dust', 'wave', 'lake', 'sea', 'bay'],
             
             # 动物
-            'fox', 'wolf', 'bear', 'owl', 'hawk', 'swan', 'deer', 'bird',
-            'fish', 'seal', 'lynx', 'dove', 'cat', 'lion', 'crow', 'duck',
-            'frog', 'goat', 'hare',
+            'animal': ['fox', 'wolf', 'bear', 'owl', 'hawk', 'swan', 'deer', 'bird',
+                       'fish', 'seal', 'lynx', 'dove', 'cat', 'lion', 'crow', 'duck',
+                       'frog', 'goat', 'hare'],
             
             # 金属/宝石
-            'iron', 'gold', 'jade', 'ruby', 'opal', 'pearl', 'gem',
+            'gem': ['iron', 'gold', 'jade', 'ruby', 'opal', 'pearl', 'gem'],
             
             # 积极/描述性词汇
-            'zen', 'soul', 'mind', 'wild', 'pure', 'dark', 'soft', 'calm',
-            'wise', 'bold', 'free', 'hope', 'joy', 'love', 'life', 'flow',
-            'peak', 'cool', 'fair', 'kind', 'true', 'real', 'deep', 'high',
+            'trait': ['zen', 'soul', 'mind', 'wild', 'pure', 'dark', 'soft', 'calm',
+                      'wise', 'bold', 'free', 'hope', 'joy', 'love', 'life', 'flow',
+                      'peak', 'cool', 'fair', 'kind', 'true', 'real', 'deep', 'high'],
             
             # 科技/现代
-            'tech', 'byte', 'code', 'data', 'node', 'web', 'net', 'bit',
-            'cyber', 'nano', 'pixel',
+            'tech': ['tech', 'byte', 'code', 'data', 'node', 'web', 'net', 'bit',
+                     'cyber', 'nano', 'pixel'],
             
             # 其他名词
-            'book', 'tale', 'song', 'tune', 'art', 'poem', 'word', 'note',
-            'path', 'road', 'way', 'gate', 'door', 'arch', 'ring', 'coin',
-            'silk', 'clay', 'ink', 'time', 'echo', 'pulse', 'beam'
-        ]
+            'thing': ['book', 'tale', 'song', 'tune', 'art', 'poem', 'word', 'note',
+                      'path', 'road', 'way', 'gate', 'door', 'arch', 'ring', 'coin',
+                      'silk', 'clay', 'ink', 'time', 'echo', 'pulse', 'beam'],
+        }
         
         # 第二组词（放在后面）
-        self.second_words = [
+        self.second_word_groups = {
             # 自然
-            'sky', 'sea', 'bay', 'ray', 'day', 'sun', 'moon', 'star',
-            'leaf', 'tree', 'rain', 'snow', 'wind', 'wave', 'lake', 'rock',
-            'wood', 'seed', 'mist', 'ice', 'fire',
+            'nature': ['sky', 'sea', 'bay', 'ray', 'day', 'sun', 'moon', 'star',
+                       'leaf', 'tree', 'rain', 'snow', 'wind', 'wave', 'lake', 'rock',
+                       'wood', 'seed', 'mist', 'ice', 'fire'],
             
             # 动物
-            'fox', 'owl', 'cat', 'wolf', 'bear', 'hawk', 'swan', 'deer',
-            'bird', 'fish', 'seal', 'dove', 'lion',
+            'animal': ['fox', 'owl', 'cat', 'wolf', 'bear', 'hawk', 'swan', 'deer',
+                       'bird', 'fish', 'seal', 'dove', 'lion'],
             
             # 时间/空间
-            'time', 'way', 'path', 'road', 'gate', 'zone', 'line', 'edge',
-            'side', 'spot',
+            'place': ['time', 'way', 'path', 'road', 'gate', 'zone', 'line', 'edge',
+                      'side', 'spot'],
             
             # 其他
-            'soul', 'mind', 'life', 'hope', 'joy', 'love', 'art', 'song',
-            'tale', 'code', 'byte', 'data', 'tech', 'web', 'net', 'zen',
-            'flow', 'beam', 'wave', 'tone', 'mode', 'type', 'view', 'mark'
-        ]
+            'thing': ['soul', 'mind', 'life', 'hope', 'joy', 'love', 'art', 'song',
+                      'tale', 'code', 'byte', 'data', 'tech', 'web', 'net', 'zen',
+                      'flow', 'beam', 'wave', 'tone', 'mode', 'type', 'view', 'mark'],
+        }
+        
+        self.first_words, self.first_categories = self._flatten(self.first_word_groups)
+        self.second_words, self.second_categories = self._flatten(self.second_word_groups)
         
         # 单独成词（6-7个字母的完整词）
         self.single_words = [
@@ -88,24 +150,101 @@ class UsernameGenerator:
         # 避免重复单词
         while word2 == word1:
             word2 = random.choice(self.second_words)
+        return self._combine(word1, word2)
+
+    def _combine(self, word1: str, word2: str) -> str:
         combined = word1 + word2
-        return combined[:7] if len(combined) > 7 else combined
+        return combined[:self.MAX_LENGTH] if len(combined) > self.MAX_LENGTH else combined
 
-    def generate_usernames(self, count: int = 100) -> List[str]:
-        """生成用户名列表"""
-        usernames = set()
-        
-        while len(usernames) < count:
-            # 80%概率组合词, 20%概率使用单个词
-            if random.random() < 0.8:
-                username = self.combine_words()
-            else:
-                username = random.choice(self.single_words).lower()
-            
-            if 6 <= len(username) <= 7:
-                usernames.add(username.lower())
-        
-        return sorted(list(usernames))
+    @staticmethod
+    def _flatten(groups: Dict[str, List[str]]) -> Tuple[List[str], List[str]]:
+        """把分组词表展开为词列表和对应的类别列表"""
+        words, categories = [], []
+        for category, group in groups.items():
+            words.extend(group)
+            categories.extend([category] * len(group))
+        return words, categories
+
+    def _source_at(self, index: int) -> Optional[Source]:
+        """按编号取候选用户名及其来源：先是所有双词组合，再是单独成词；不合格返回 None"""
+        pairs = len(self.first_words) * len(self.second_words)
+        if index < pairs:
+            i, j = divmod(index, len(self.second_words))
+            word1, word2 = self.first_words[i], self.second_words[j]
+            if word1 == word2:
+                return None
+            username = self._combine(word1, word2)
+            source = (username.lower(), self.first_categories[i], self.second_categories[j],
+                      len(word1) + len(word2) - len(username))
+        else:
+            source = (self.single_words[index - pairs].lower(), 'single', 'single', 0)
+        return source if self.MIN_LENGTH <= len(source[0]) <= self.MAX_LENGTH else None
+
+    def _candidate_at(self, index: int) -> Optional[str]:
+        source = self._source_at(index)
+        return source[0] if source else None
+
+    def _raw_count(self) -> int:
+        return len(self.first_words) * len(self.second_words) + len(self.single_words)
+
+    def candidate_space(self) -> List[str]:
+        """所有合格且去重后的候选用户名（已排序，首次调用时计算并缓存）"""
+        if getattr(self, '_space', None) is None:
+            candidates = (self._candidate_at(i) for i in range(self._raw_count()))
+            self._space = sorted({c for c in candidates if c})
+        return self._space
+
+    def ranked_usernames(self) -> List[str]:
+        """按分数从高到低排列的全部候选用户名（首次调用时计算并缓存）
+
+        同一用户名可能由多种组合得到，取其中最高的分数。
+        """
+        if getattr(self, '_ranked', None) is None:
+            sources = [s for s in map(self._source_at, range(self._raw_count())) if s]
+            best = {}
+            for (username, *_), score in zip(sources, UsernameScorer().score_all(sources)):
+                if score > best.get(username, float('-inf')):
+                    best[username] = score
+            self._ranked = sorted(best, key=lambda u: (-best[u], u))
+        return self._ranked
+
+    def iter_usernames(self, seed: Optional[int] = None, ranked: bool = False) -> Iterator[str]:
+        """逐个产出不重复的用户名
+
+        ranked 为 True 时按分数从高到低产出；否则按随机顺序产出且不预先构建完整列表，
+        以仿射置换 i -> (a*i + b) mod n 遍历所有组合编号，只需记住已产出的用户名。
+        """
+        if ranked:
+            yield from self.ranked_usernames()
+            return
+        rng = random.Random(seed)
+        n = self._raw_count()
+        step = rng.randrange(1, n) if n > 1 else 1
+        while math.gcd(step, n) != 1:
+            step = rng.randrange(1, n)
+        offset = rng.randrange(n)
+        seen = set()
+        for i in range(n):
+            username = self._candidate_at((step * i + offset) % n)
+            if username and username not in seen:
+                seen.add(username)
+                yield username
+
+    def generate_usernames(self, count: int = 100, seed: Optional[int] = None,
+                           ranked: bool = False) -> List[str]:
+        """生成用户名列表，数量超过候选总数时直接报错
+
+        ranked 为 True 时返回分数最高的 count 个（按分数排列），否则从候选空间中无放回抽样。
+        """
+        # 排序列表与候选空间包含相同的用户名，ranked 时直接用排序列表
+        if count < 0:
+            raise ValueError(f"用户名数量不能为负数: {count}")
+        space = self.ranked_usernames() if ranked else self.candidate_space()
+        if count > len(space):
+            raise ValueError(f"最多只能生成 {len(space)} 个不同的用户名，请求数量为 {count}")
+        if ranked:
+            return space[:count]
+        return sorted(random.Random(seed).sample(space, count))
 
     @staticmethod
     def save_to_file(usernames: List[str]) -> str:
@@ -119,17 +258,21 @@ class UsernameGenerator:
         
         return filepath
 
-def main():
-    """主函数"""
-    parser = argparse.ArgumentParser(description='Gmail用户名生成器')
-    parser.add_argument('-n', '--number', type=int, default=100,
-                      help='要生成的用户名数量 (默认: 100)')
-    args = parser.parse_args()
-    
-    print("🚀 开始生成用户名...")
-    
+def run(args) -> int:
+    """执行 generate 子命令，参数定义见 cli.py"""
     generator = UsernameGenerator()
-    usernames = generator.generate_usernames(args.number)
+    try:
+        usernames = generator.generate_usernames(args.number, seed=args.seed,
+                                                 ranked=not args.random)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if args.stdout:
+        # 每行一个用户名，便于在脚本中通过管道使用
+        print("\n".join(usernames))
+        return 0
+
+    print("🚀 开始生成用户名...")
     filepath = UsernameGenerator.save_to_file(usernames)
     
     print(f"✅ 已生成 {len(usernames)} 个用户名")
@@ -137,6 +280,12 @@ def main():
     print("\n示例用户名:")
     for username in usernames[:5]:
         print(f"- {username}")
+    return 0
+
+def main():
+    """主函数，保留原有用法，等同于 python cli.py generate ..."""
+    from cli import main as cli_main
+    sys.exit(cli_main(['generate', *sys.argv[1:]]))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
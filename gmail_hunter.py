@@ -1,73 +1,204 @@
 import json
-from playwright.sync_api import sync_playwright
-import time
 import logging
-from typing import Tuple, List
-from datetime import datetime
-import argparse
+from typing import Dict, Iterable, List, Optional, Tuple
 import sys
-from InquirerPy import inquirer
-from InquirerPy.base.control import Choice
-from InquirerPy.separator import Separator
 import os
+import re
 import random
+from metrics import metrics
+from result_store import ResultStore, ResultLog, DEFAULT_TTL_HOURS
+from username_utils import UsernameFilter, filter_usernames, load_usernames
+from generator import UsernameGenerator
+from outcome import CheckResult, Outcome, OutcomeClassifier, ResultSet
+
+# Playwright 和 InquirerPy 导入较慢，只在真正打开浏览器或交互界面时才导入，
+# 使 query、generate 等不需要浏览器的子命令快速启动
 
 class BrowserManager:
     """浏览器管理类"""
     def __init__(self, headless: bool = True):
         self.headless = headless
+        self.playwright = None
+        self.browser = None
     
     def __enter__(self):
-        self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(
-            headless=self.headless,
-            args=['--window-size=1280,800', '--disable-blink-features=AutomationControlled']
-        )
-        context = self.browser.new_context(
-            viewport={'width': 1280, 'height': 800},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
-        return context.new_page()
+        from playwright.sync_api import sync_playwright
+        try:
+            self.playwright = sync_playwright().start()
+            self.browser = self.playwright.chromium.launch(
+                headless=self.headless,
+                args=['--window-size=1280,800', '--disable-blink-features=AutomationControlled']
+            )
+            context = self.browser.new_context(
+                viewport={'width': 1280, 'height': 800},
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            )
+            return context.new_page()
+        except Exception:
+            # 启动失败（例如未安装浏览器）时 Playwright 驱动已经启动，需要关掉，避免泄漏和重复启动
+            try:
+                self.__exit__(None, None, None)
+            except Exception as e:
+                logging.warning(f"⚠️ 清理浏览器失败: {e}")
+            raise
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if hasattr(self, 'browser'): self.browser.close()
-        if hasattr(self, 'playwright'): self.playwright.stop()
+        """关闭浏览器和 Playwright，可重复调用"""
+        browser, playwright = self.browser, self.playwright
+        self.browser = self.playwright = None
+        try:
+            if browser: browser.close()
+        finally:
+            if playwright: playwright.stop()
+
+class RegistrationError(Exception):
+    """注册流程中某一步的页面没有按预期出现"""
+
+class BrowserUnavailableError(Exception):
+    """连续多次无法打开或重建浏览器会话，继续检查没有意义"""
 
 class GmailRegistration:
     """Gmail 注册流程处理"""
+    SIGNUP_URL = "https://accounts.google.com/signup"
+    STEP_TIMEOUT = 15000  # 每一步等待页面的超时时间（毫秒）
+    NEXT_BUTTON = "下一步"
+    OPTION_SELECTOR = "li[role='option'], div[role='option']"
+    EXPANDED_COMBOBOX = "div[role='combobox'][aria-expanded='true']"
+    USERNAME_SELECTOR = "input[name='Username']"
+    GMAIL_OPTION_SELECTOR = "input[type='radio']"
+    # 同意条款等插页上的按钮
+    CONSENT_BUTTONS = re.compile(r"全部接受|我同意|Accept all|I agree")
+
     @staticmethod
-    def init_registration(page) -> None:
+    @metrics.timed("setup")
+    def init_registration(page, signup_url: str = SIGNUP_URL) -> None:
         """初始注册流程"""
-        logging.info("🌐 正在访问注册页面...")
-        page.goto("https://accounts.google.com/signup")
-        time.sleep(2)
+        GmailRegistration._open_signup(page, signup_url)
 
         logging.info("📝 开始填写注册信息...")
         GmailRegistration._fill_basic_info(page)
         GmailRegistration._fill_birthday_and_gender(page)
-        # Gmail新版流程：生日后直接进入用户名输入页面
+        GmailRegistration._enter_username_step(page)
         logging.info("✅ 注册信息填写完成，已进入用户名输入页面")
+
+    @staticmethod
+    def _enter_username_step(page) -> None:
+        """生日页之后进入用户名输入页面"""
+        # Gmail新版流程：生日后直接进入用户名输入页面；旧版流程先选择 Gmail 地址选项
+        step = GmailRegistration._wait_for(
+            page, f"{GmailRegistration.USERNAME_SELECTOR}, {GmailRegistration.GMAIL_OPTION_SELECTOR}",
+            "用户名页面")
+        if step.get_attribute("type") == "radio":
+            GmailRegistration._select_gmail_option(page)
+
+    @staticmethod
+    def detect_step(page) -> str:
+        """判断页面当前处于注册流程的哪一步（不等待，立即返回）"""
+        if page.is_closed():
+            return "closed"
+        steps = (
+            ("password", "input[type='password']"),
+            ("username", GmailRegistration.USERNAME_SELECTOR),
+            ("gmail_option", GmailRegistration.GMAIL_OPTION_SELECTOR),
+            ("birthday", "input[name='year']"),
+            ("name", "input[name='firstName']"),
+        )
+        for step, selector in steps:
+            if page.locator(selector).first.is_visible():
+                return step
+        if GmailRegistration._consent_button(page).count() > 0:
+            return "consent"
+        return "unknown"
+
+    @staticmethod
+    def _consent_button(page):
+        return page.get_by_role("button", name=GmailRegistration.CONSENT_BUTTONS)
+
+    @staticmethod
+    @metrics.timed("recover")
+    def resume_registration(page, signup_url: str = SIGNUP_URL) -> None:
+        """从页面当前所处的步骤继续，只补做缺失的步骤，回到用户名输入页面"""
+        for _ in range(4):
+            step = GmailRegistration.detect_step(page)
+            logging.info(f"🧭 当前页面处于: {step}")
+            if step == "username":
+                return
+            if step == "closed":
+                raise RegistrationError("页面已关闭")
+            if step == "password":
+                with metrics.wait("go_back"):
+                    page.go_back(timeout=GmailRegistration.STEP_TIMEOUT)
+            elif step == "consent":
+                GmailRegistration._consent_button(page).first.click(timeout=GmailRegistration.STEP_TIMEOUT)
+            elif step == "gmail_option":
+                GmailRegistration._select_gmail_option(page)
+            elif step == "birthday":
+                GmailRegistration._fill_birthday_and_gender(page)
+                GmailRegistration._enter_username_step(page)
+            elif step == "name":
+                GmailRegistration._fill_basic_info(page)
+                GmailRegistration._fill_birthday_and_gender(page)
+                GmailRegistration._enter_username_step(page)
+            else:
+                GmailRegistration.init_registration(page, signup_url)
+        if GmailRegistration.detect_step(page) != "username":
+            raise RegistrationError(f"无法回到用户名输入页面，当前页面: {page.url}")
+
+    @staticmethod
+    def _wait_for(page, selector: str, step: str, timeout: int = STEP_TIMEOUT):
+        """等待某一步依赖的元素出现，超时抛出 RegistrationError"""
+        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+        try:
+            with metrics.wait(step):
+                return page.wait_for_selector(selector, state="visible", timeout=timeout)
+        except PlaywrightTimeoutError:
+            raise RegistrationError(f"等待{step}超时 ({timeout / 1000:g} 秒)，未找到 {selector}，"
+                                    f"当前页面: {page.url}") from None
+
+    @staticmethod
+    def _wait_combobox(page, label: str, state: str) -> None:
+        """等待下拉框展开 (visible) 或收起 (hidden)"""
+        with metrics.wait(label):
+            page.locator(GmailRegistration.EXPANDED_COMBOBOX).first.wait_for(
+                state=state, timeout=GmailRegistration.STEP_TIMEOUT)
+
+    @staticmethod
+    def _click_next(page) -> None:
+        with metrics.wait("next"):
+            page.get_by_role("button", name=GmailRegistration.NEXT_BUTTON).click(
+                timeout=GmailRegistration.STEP_TIMEOUT)
+
+    @staticmethod
+    @metrics.timed("setup.open")
+    def _open_signup(page, signup_url: str = SIGNUP_URL) -> None:
+        """打开注册页面并等待姓名输入框"""
+        logging.info("🌐 正在访问注册页面...")
+        with metrics.wait("goto"):
+            page.goto(signup_url, wait_until="domcontentloaded",
+                      timeout=GmailRegistration.STEP_TIMEOUT * 2)
+        GmailRegistration._wait_for(page, "input[name='firstName']", "姓名页面")
     
     @staticmethod
+    @metrics.timed("setup.basic_info")
     def _fill_basic_info(page) -> None:
         """填写基本信息"""
         logging.info("👤 正在填写基本信息...")
         page.fill("input[name='firstName']", "Test")
         page.fill("input[name='lastName']", "User")
-        page.get_by_role("button", name="下一步").click()
-        time.sleep(2)
+        GmailRegistration._click_next(page)
+        GmailRegistration._wait_for(page, "input[name='year']", "生日页面")
         logging.info("✅ 基本信息填写完成")
     
     @staticmethod
+    @metrics.timed("setup.birthday_gender")
     def _fill_birthday_and_gender(page) -> None:
         """填写生日和性别 - 支持新版Gmail Material Design UI"""
         logging.info("📅 正在填写生日信息...")
-        time.sleep(2)
+        timeout = GmailRegistration.STEP_TIMEOUT
 
         # 1. 填写年份（普通input）
         try:
-            page.fill("input[name='year']", "1995")
-            time.sleep(0.5)
+            page.fill("input[name='year']", "1995", timeout=timeout)
         except:
             logging.warning("⚠️ 年份填写可能失败")
 
@@ -76,19 +207,18 @@ class GmailRegistration:
             logging.info("   选择月份...")
             # Gmail新UI使用 div[role='combobox']
             month_trigger = page.locator("div[role='combobox']").first
-            month_trigger.click()
-            time.sleep(1.5)
-            # 选择第一个选项（1月）
-            page.locator("li[role='option'], div[role='option']").first.click(force=True)
-            time.sleep(1)  # 等待popup完全关闭
+            month_trigger.click(timeout=timeout)
+            # 等待选项展开后选择第一个选项（1月），再等待popup完全关闭
+            GmailRegistration._wait_combobox(page, "month_open", "visible")
+            page.locator(GmailRegistration.OPTION_SELECTOR).first.click(force=True, timeout=timeout)
+            GmailRegistration._wait_combobox(page, "month_close", "hidden")
             logging.info("   ✅ 月份选择成功")
         except Exception as e:
             logging.warning(f"⚠️ 月份选择失败: {e}")
 
         # 3. 填写日期（普通input）
         try:
-            page.fill("input[name='day']", "15")
-            time.sleep(0.5)
+            page.fill("input[name='day']", "15", timeout=timeout)
         except:
             logging.warning("⚠️ 日期填写可能失败")
 
@@ -98,27 +228,25 @@ class GmailRegistration:
         try:
             logging.info("👤 正在选择性别...")
             gender_trigger = page.locator("div[role='combobox']").nth(1)
-            gender_trigger.click()
-            time.sleep(1.5)  # 等待dropdown展开
-            # 使用键盘操作选择：向下箭头2次，然后回车
+            gender_trigger.click(timeout=timeout)
+            # 等待dropdown展开，再用键盘操作选择：向下箭头2次，然后回车
+            GmailRegistration._wait_combobox(page, "gender_open", "visible")
             page.keyboard.press("ArrowDown")
-            time.sleep(0.3)
             page.keyboard.press("ArrowDown")
-            time.sleep(0.3)
             page.keyboard.press("Enter")
-            time.sleep(1)
+            GmailRegistration._wait_combobox(page, "gender_close", "hidden")
             logging.info("✅ 性别选择完成")
         except Exception as e:
             logging.warning(f"⚠️ 性别选择失败: {e}")
 
-        page.get_by_role("button", name="下一步").click()
-        time.sleep(2)
+        GmailRegistration._click_next(page)
     
     @staticmethod
+    @metrics.timed("setup.gmail_option")
     def _select_gmail_option(page) -> None:
         """选择 Gmail 地址选项"""
         logging.info("📧 正在处理 Gmail 地址选项...")
-        time.sleep(3)  # 增加等待时间确保页面加载完成
+        GmailRegistration._wait_for(page, GmailRegistration.GMAIL_OPTION_SELECTOR, "Gmail 地址选项")
         success = page.evaluate("""() => {
             const labels = Array.from(document.querySelectorAll('label'));
             const targetLabel = labels.find(label =>
@@ -142,95 +270,260 @@ class GmailRegistration:
         else:
             logging.warning("⚠️ Gmail 地址选项选择可能失败")
 
-        time.sleep(2)
-        page.get_by_role("button", name="下一步").click()
-        time.sleep(3)  # 等待用户名页面加载
+        GmailRegistration._click_next(page)
+        GmailRegistration._wait_for(page, GmailRegistration.USERNAME_SELECTOR, "用户名页面")
         logging.info("✅ Gmail 选项处理完成")
 
+class CheckSession:
+    """浏览器会话：初始化注册流程，在页面偏离用户名步骤或浏览器崩溃时就地恢复
+
+    单个用户名检查失败时先按页面当前步骤补做缺失的步骤，不行再重建浏览器，
+    然后重试当前用户名，最多重试 max_retries 次。
+    """
+    RETRY_BACKOFF = 1.0  # 第一次重试前等待的秒数，之后每次翻倍
+    MAX_OPEN_FAILURES = 3  # 连续打开/重建失败达到此次数时中止整个运行
+
+    def __init__(self, browser_manager: BrowserManager, signup_url: str, max_retries: int = 2):
+        self.browser_manager = browser_manager
+        self.signup_url = signup_url
+        self.max_retries = max_retries
+        self.page = None
+        self.open_failures = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self) -> None:
+        """打开浏览器并走完注册流程；连续失败 MAX_OPEN_FAILURES 次时抛出 BrowserUnavailableError"""
+        try:
+            self.page = self.browser_manager.__enter__()
+            GmailRegistration.init_registration(self.page, self.signup_url)
+        except Exception as e:
+            self.open_failures += 1
+            if self.open_failures >= self.MAX_OPEN_FAILURES:
+                self.close()
+                raise BrowserUnavailableError(
+                    f"连续 {self.open_failures} 次无法打开浏览器会话，停止检查: {e}") from e
+            raise
+        self.open_failures = 0
+
+    def close(self) -> None:
+        self.page = None
+        try:
+            self.browser_manager.__exit__(None, None, None)
+        except Exception as e:
+            logging.warning(f"⚠️ 关闭浏览器失败: {e}")
+
+    def rebuild(self) -> None:
+        """关闭浏览器并重新走一遍注册流程"""
+        logging.warning("♻️ 正在重建浏览器会话...")
+        self.close()
+        self.open()
+
+    def recover(self) -> None:
+        """先尝试在当前页面补做缺失的步骤，失败则重建浏览器"""
+        try:
+            GmailRegistration.resume_registration(self.page, self.signup_url)
+            logging.info("✅ 会话已恢复到用户名输入页面")
+        except Exception as e:
+            logging.warning(f"⚠️ 无法在当前页面恢复: {e}")
+            self.rebuild()
+
+    def check(self, checker: 'GmailChecker', username: str) -> CheckResult:
+        """检查一个用户名，遇到异常或页面状态不对时恢复会话并重试
+
+        打开浏览器、恢复和重建会话失败同样计入重试次数，每次重试前按指数退避等待；
+        次数用完后返回 ERROR 结果，由调用方继续检查下一个用户名。
+        """
+        result = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = self.RETRY_BACKOFF * 2 ** (attempt - 1)
+                logging.warning(f"🔧 {username}: {result.message}，{delay:g} 秒后恢复会话并重试 "
+                                f"({attempt}/{self.max_retries})")
+                metrics.sleep(delay, "retry_backoff")
+            try:
+                if self.page is None:
+                    self.open()
+                elif attempt:
+                    self.recover()
+                result = checker._try_check(self.page, username)
+                if not result.outcome.retryable:
+                    return result
+            except BrowserUnavailableError:
+                raise
+            except Exception as e:
+                logging.error(f"❌ {username}: {str(e)}")
+                result = CheckResult(username, Outcome.ERROR, str(e))
+        return result
+
 class GmailChecker:
     """Gmail 用户名检查类"""
-    def __init__(self, headless: bool = True):
+    NO_INPUT_MESSAGE = "无法找到用户名输入框"
+    RANDOM_DELAY = (0.2, 3.0)
+
+    def __init__(self, headless: bool = True, store: ResultStore = None,
+                 ttl_hours: float = DEFAULT_TTL_HOURS, result_log: ResultLog = None,
+                 signup_url: str = GmailRegistration.SIGNUP_URL, max_retries: int = 2,
+                 random_delay: Optional[Tuple[float, float]] = RANDOM_DELAY, seed: Optional[int] = None):
         self.browser_manager = BrowserManager(headless)
+        # 填写用户名前的随机延迟范围（秒），None 表示不延迟；seed 使延迟序列可复现
+        self.random_delay = random_delay
+        self.rng = random.Random(seed)
+        self.signup_url = signup_url
+        self.max_retries = max_retries
+        self.store = store
+        self.ttl_hours = ttl_hours
+        self.result_log = result_log
+        self.classifier = OutcomeClassifier()
     
-    def check_usernames_batch(self, usernames: List[str]) -> List[Tuple[str, bool, str]]:
+    def check_usernames_batch(self, usernames: List[str]) -> ResultSet:
         """批量检查用户名"""
-        results = []
+        results = ResultSet()
+        if self.store:
+            usernames, cached = self.store.partition(usernames, self.ttl_hours)
+            results.extend(cached)
+            if self.result_log:
+                self.result_log.write_many(cached)
+        if not usernames:
+            logging.info("✅ 没有需要在浏览器中检查的用户名")
+            return results
         try:
             logging.info("🚀 开始批量检查用户名...")
-            with self.browser_manager as page:
-                GmailRegistration.init_registration(page)
+            with self._session() as session:
                 total = len(usernames)
                 for i, username in enumerate(usernames, 1):
                     logging.info(f"📍 正在检查第 {i}/{total} 个用户名...")
-                    results.append(self._check_single_username(page, username))
+                    result = session.check(self, username)
+                    self._record(result)
+                    results.append(result)
             logging.info("✅ 批量检查完成")
             return results
         except Exception as e:
             logging.error(f"❌ 批量检查失败: {str(e)}")
             return results
     
+    def check_usernames_stream(self, usernames: Iterable[str],
+                               target_available: Optional[int] = None, found: int = 0) -> ResultSet:
+        """逐个拉取并检查用户名，找到 target_available 个可用用户名后立即停止
+
+        有新鲜历史结果的用户名直接复用，浏览器在第一个需要检查的用户名出现时才启动。
+        found 为此前已找到的可用用户名数量（例如 --resume 的日志中已有的），计入目标。
+        """
+        results = ResultSet()
+        if target_available and found >= target_available:
+            logging.info(f"🎯 已有 {found} 个可用用户名，达到目标，无需继续检查")
+            return results
+        try:
+            with self._session() as session:
+                for username in usernames:
+                    result = self.store.fresh_result(username, self.ttl_hours) if self.store else None
+                    if result:
+                        logging.info(f"💾 {username}: 使用历史结果")
+                        if self.result_log:
+                            self.result_log.write(result)
+                    else:
+                        if session.page is None:
+                            logging.info("🚀 开始流式检查用户名...")
+                        logging.info(f"📍 正在检查第 {len(results) + 1} 个用户名...")
+                        result = session.check(self, username)
+                        self._record(result)
+                    results.append(result)
+                    if result.available:
+                        found += 1
+                        if target_available and found >= target_available:
+                            logging.info(f"🎯 已找到 {found} 个可用用户名，达到目标，停止检查")
+                            break
+            logging.info("✅ 流式检查完成")
+            return results
+        except Exception as e:
+            logging.error(f"❌ 流式检查失败: {str(e)}")
+            return results
+    
+    def _session(self) -> CheckSession:
+        return CheckSession(self.browser_manager, self.signup_url, self.max_retries)
+    
+    def _record(self, result: CheckResult) -> None:
+        """把新的检查结果写入结果库和结果日志"""
+        if self.store:
+            self.store.record(result)
+        if self.result_log:
+            self.result_log.write(result)
+    
     def check_username(self, username: str) -> Tuple[bool, str]:
         """检查单个用户名"""
-        results = self.check_usernames_batch([username])
-        return (results[0][1], results[0][2]) if results else (False, "检查失败")
+        usernames, invalid = filter_usernames([username])
+        if invalid:
+            return (False, invalid[0].message)
+        results = self.check_usernames_batch(usernames)
+        return (results[0].available, results[0].message) if results else (False, "检查失败")
     
-    def _check_single_username(self, page, username: str) -> Tuple[str, bool, str]:
-        """检查单个用户名的可用性"""
+    def _check_single_username(self, page, username: str) -> CheckResult:
+        """检查单个用户名的可用性，异常时返回 ERROR 结果而不抛出"""
         try:
-            logging.info(f"🔍 正在检查: {username}")
-            logging.info("🔍 查找用户名输入框...")
-            # 使用更精确的选择器定位用户名输入框
-            username_input = page.wait_for_selector("input[name='Username']", timeout=5000)
-            if not username_input:
-                logging.error(f"❌ {username}: 无法找到用户名输入框")
-                return (username, False, "无法找到用户名输入框")
-
-            # 添加随机延迟 (200ms-3s)
-            delay = random.uniform(0.2, 3)
+            return self._try_check(page, username)
+        except Exception as e:
+            logging.error(f"❌ {username}: {str(e)}")
+            return CheckResult(username, Outcome.ERROR, str(e))
+    
+    @metrics.timed("check")
+    def _try_check(self, page, username: str) -> CheckResult:
+        """检查单个用户名的可用性，页面操作异常会直接抛出"""
+        logging.info(f"🔍 正在检查: {username}")
+        logging.info("🔍 查找用户名输入框...")
+        # 使用更精确的选择器定位用户名输入框
+        with metrics.wait("username_input"):
+            username_input = page.wait_for_selector(GmailRegistration.USERNAME_SELECTOR, timeout=5000)
+        if not username_input:
+            logging.error(f"❌ {username}: {self.NO_INPUT_MESSAGE}")
+            return CheckResult(username, Outcome.UNKNOWN, self.NO_INPUT_MESSAGE)
+
+        # 添加随机延迟 (默认 200ms-3s)
+        if self.random_delay:
+            delay = self.rng.uniform(*self.random_delay)
             logging.info(f"⏳ 等待 {delay:.1f} 秒...")
-            time.sleep(delay)
+            metrics.sleep(delay, "random_delay")
 
-            username_input.fill(username)
-            time.sleep(0.5)  # 填写后稍等
+        username_input.fill(username)
+        metrics.sleep(0.5)  # 填写后稍等
+        before = self.classifier.snapshot(page)
 
+        with metrics.wait("next"):
             page.get_by_role("button", name="下一步").click()
 
-            logging.info("⏳ 等待检查结果...")
-            time.sleep(3)  # 增加等待时间让错误信息完全加载
-
-            # 检查是否跳转到密码页面（表示用户名可用）
-            if page.locator("input[type='password']").count() > 0:
-                logging.info(f"✅ {username}: 可用")
-                page.go_back()
-                time.sleep(1)
-                return (username, True, "用户名可用")
-
-            # 查找真正的错误信息 - aria-live=polite 才是错误信息！
-            error_divs = page.locator("div[aria-live='polite']").all()
-            for div in error_divs:
-                text = div.text_content().strip()
-                # 排除无关信息
-                if text and text != "简体中文" and "输入的字符数" not in text:
-                    # 这是真正的错误信息
-                    if len(text) > 5:  # 有实际内容
-                        logging.info(f"❌ {username}: {text}")
-                        return (username, False, text)
-
-            # 如果没有明确的错误，可能是其他问题
-            logging.info(f"⚠️  {username}: 状态未知")
-            return (username, False, "状态未知")
+        logging.info("⏳ 等待检查结果...")
+        metrics.sleep(3, "result")  # 增加等待时间让错误信息完全加载
 
-        except Exception as e:
-            logging.error(f"❌ {username}: {str(e)}")
-            return (username, False, str(e))
+        result = self.classifier.classify(page, username, before)
+        if result.available:
+            logging.info(f"✅ {username}: 可用")
+            # 返回失败不影响本次结果，下一个用户名检查时会恢复页面
+            try:
+                with metrics.wait("go_back"):
+                    page.go_back()
+                metrics.sleep(1)
+            except Exception as e:
+                logging.warning(f"⚠️ 返回用户名页面失败: {e}")
+        elif result.outcome is Outcome.TAKEN:
+            logging.info(f"❌ {username}: {result.message}")
+        else:
+            logging.info(f"⚠️  {username}: {result.message}")
+        return result
 
 class ConsoleUI:
     """控制台交互界面"""
-    def __init__(self, headless: bool = False):
-        self.checker = GmailChecker(headless=headless)
+    def __init__(self, headless: bool = False, store: ResultStore = None,
+                 ttl_hours: float = DEFAULT_TTL_HOURS):
+        self.checker = GmailChecker(headless=headless, store=store, ttl_hours=ttl_hours)
 
     def start(self):
         """启动交互式界面"""
+        from InquirerPy import inquirer
+        from InquirerPy.base.control import Choice
+        from InquirerPy.separator import Separator
         try:
             print("\n=== Gmail 用户名检查工具 ===")
             
@@ -258,6 +551,7 @@ class ConsoleUI:
             sys.exit(0)
     
     def _handle_choice(self, choice: str):
+        from InquirerPy import inquirer
         if choice == "0":
             print("\n👋 感谢使用，再见！")
             sys.exit(0)
@@ -287,11 +581,9 @@ class ConsoleUI:
             
             if filepath:
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        usernames = [line.strip() for line in f if line.strip()]
-                    if usernames:
-                        results = self.checker.check_usernames_batch(usernames)
-                        ResultHandler.save_and_show_results(results)
+                    usernames, invalid = load_usernames(filepath)
+                    if usernames or invalid:
+                        self._run_batch(usernames, invalid)
                     else:
                         print("\n❌ 文件为空")
                 except Exception as e:
@@ -311,9 +603,9 @@ class ConsoleUI:
                     break
                 usernames.append(line)
                 
-            if usernames:
-                results = self.checker.check_usernames_batch(usernames)
-                ResultHandler.save_and_show_results(results)
+            usernames, invalid = filter_usernames(usernames)
+            if usernames or invalid:
+                self._run_batch(usernames, invalid)
                 sys.exit(0)
                 
         elif choice == "4":
@@ -324,6 +616,15 @@ class ConsoleUI:
             print("\n❌ 无效的选项，请重试")
             self.start()
     
+    def _run_batch(self, usernames: List[str], invalid: List[CheckResult]):
+        """批量检查并把结果逐条写入日志"""
+        with ResultLog(ResultLog.new_path()) as result_log:
+            self.checker.result_log = result_log
+            result_log.write_many(invalid)
+            self.checker.check_usernames_batch(usernames)
+        ResultHandler.save_and_show_results(result_log.path)
+        ResultHandler.save_metrics(result_log.path)
+    
     def _show_help(self):
         """显示帮助信息"""
         print("\n=== 使用说明 ===")
@@ -336,91 +637,140 @@ class ConsoleUI:
 class ResultHandler:
     """结果处理类"""
     @staticmethod
-    def save_and_show_results(results: List[Tuple[str, bool, str]]) -> None:
+    def save_and_show_results(log_path: str) -> None:
+        """流式读取结果日志，生成 JSON 结果和可用用户名文件，每个用户名只取最后一条记录"""
         logging.info("📊 正在保存检查结果...")
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        # 确保 result 目录存在
-        os.makedirs('result', exist_ok=True)
+        stem = os.path.splitext(log_path)[0]
+        json_file = f"{stem}.json"
+        available_file = os.path.join(os.path.dirname(stem),
+                                      os.path.basename(stem).replace('results_', 'available_', 1) + ".txt")
         
-        # 保存 JSON 结果
-        json_file = os.path.join('result', f"results_{timestamp}.json")
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump([{
-                "username": username,
-                "available": available,
-                "message": message,
-                "check_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            } for username, available, message in results], f, ensure_ascii=False, indent=2)
+        counts = {o: 0 for o in Outcome}
+        total = 0
+        with open(json_file, 'w', encoding='utf-8') as jf, \
+                open(available_file, 'w', encoding='utf-8') as af:
+            jf.write("[")
+            for record in ResultLog.iter_final_records(log_path):
+                jf.write(",\n  " if total else "\n  ")
+                jf.write(json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+                total += 1
+                outcome = ResultLog.record_outcome(record)
+                counts[outcome] += 1
+                if outcome is Outcome.AVAILABLE:
+                    af.write(f"{record['username']}\n")
+            jf.write("\n]\n" if total else "]\n")
         logging.info(f"📄 详细结果已保存到: {json_file}")
         
-        # 保存可用用户名
-        available_usernames = [(u, m) for u, a, m in results if a]
-        available_file = None
-        if available_usernames:
-            available_file = os.path.join('result', f"available_{timestamp}.txt")
-            with open(available_file, 'w', encoding='utf-8') as f:
-                for username, _ in available_usernames:
-                    f.write(f"{username}\n")
+        if counts[Outcome.AVAILABLE]:
             logging.info(f"💾 可用的用户名已保存到: {available_file}")
+        else:
+            os.remove(available_file)
+            available_file = None
         
         # 显示统计结果
-        total = len(results)
-        available_count = len(available_usernames)
-        ResultHandler._print_statistics(total, available_count, json_file, available_file)
+        ResultHandler._print_statistics(counts, json_file, available_file)
     
     @staticmethod
-    def _print_statistics(total: int, available: int, json_file: str, available_file: str = None) -> None:
+    def save_metrics(log_path: str, prom_file: str = None) -> None:
+        """保存本次运行的分阶段耗时统计"""
+        metrics.log_summary()
+        stem = os.path.splitext(log_path)[0]
+        metrics_file = os.path.join(os.path.dirname(stem),
+                                    os.path.basename(stem).replace('results_', 'metrics_', 1) + ".json")
+        metrics.write_json(metrics_file)
+        logging.info(f"⏱️ 耗时统计已保存到: {metrics_file}")
+        if prom_file:
+            metrics.write_prometheus(prom_file)
+            logging.info(f"📈 Prometheus 指标已写入: {prom_file}")
+    
+    OUTCOME_LABELS = {
+        Outcome.AVAILABLE: "✅ 可用",
+        Outcome.TAKEN: "❌ 已被占用",
+        Outcome.INVALID: "🚫 无效",
+        Outcome.UNKNOWN: "⚠️ 状态未知",
+        Outcome.ERROR: "💥 出错",
+    }
+    
+    @staticmethod
+    def _print_statistics(counts: Dict[Outcome, int], json_file: str, available_file: str = None) -> None:
         print("\n" + "-" * 50)
-        print(f"📊 检查完成! 共检查 {total} 个用户名")
-        print(f"✅ 可用: {available} 个")
-        print(f"❌ 不可用: {total - available} 个")
+        print(f"📊 检查完成! 共检查 {sum(counts.values())} 个用户名")
+        for outcome, label in ResultHandler.OUTCOME_LABELS.items():
+            # 可用和已被占用总是显示，其余类型只在出现时显示
+            if counts[outcome] or outcome in (Outcome.AVAILABLE, Outcome.TAKEN):
+                print(f"{label}: {counts[outcome]} 个")
         print("-" * 50)
-        if available > 0 and available_file:
+        if counts[Outcome.AVAILABLE] and available_file:
             print(f"\n💾 可用的用户名已保存到: {available_file}")
         print(f"📄 详细结果已保存到: {json_file}")
 
-def setup_logging():
-    """配置日志"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-
-def main():
-    """主函数"""
-    parser = argparse.ArgumentParser(description='Gmail 用户名可用性检查工具')
-    parser.add_argument('username', nargs='?', help='要检查的用户名')
-    parser.add_argument('-f', '--file', help='包含用户名列表的文件路径')
-    parser.add_argument('--headless', action='store_true', help='使用无头模式')
-    
-    args = parser.parse_args()
-    setup_logging()
-    
+def run(args) -> None:
+    """执行 check 子命令，参数定义见 cli.py"""
+    store = None if args.no_cache else ResultStore(args.db)
+    result_log = None
     try:
-        checker = GmailChecker(headless=args.headless)
+        checker = GmailChecker(headless=args.headless, store=store, ttl_hours=args.ttl,
+                               max_retries=args.retries)
         
+        username_filter = None
         if args.file:
-            with open(args.file, 'r', encoding='utf-8') as f:
-                usernames = [line.strip() for line in f if line.strip()]
-            results = checker.check_usernames_batch(usernames)
+            usernames, invalid = load_usernames(args.file)
         elif args.username:
-            available, message = checker.check_username(args.username)
-            results = [(args.username, available, message)]
+            usernames, invalid = filter_usernames([args.username])
+        elif args.pipeline:
+            candidates = UsernameGenerator().iter_usernames(seed=args.seed, ranked=not args.random)
+            username_filter = UsernameFilter()
+            usernames, invalid = username_filter.feed(candidates), username_filter.invalid
         else:
-            ConsoleUI(headless=args.headless).start()
+            ConsoleUI(headless=args.headless, store=store, ttl_hours=args.ttl).start()
             return
-            
-        ResultHandler.save_and_show_results(results)
+        
+        if args.resume:
+            log_path = ResultLog.latest_path() if args.resume == 'latest' else args.resume
+            if not log_path or not os.path.exists(log_path):
+                raise FileNotFoundError(f"找不到要继续的结果日志: {args.resume}")
+            result_log = ResultLog(log_path)
+            checked = result_log.checked_usernames()
+            found = result_log.available_count()
+            usernames = (u for u in usernames if u not in checked)
+            logging.info(f"⏯️ 从 {log_path} 继续，跳过已有的 {len(checked)} 个结果（其中 {found} 个可用）")
+        else:
+            checked, found = set(), 0
+            result_log = ResultLog(ResultLog.new_path())
+        
+        checker.result_log = result_log
+        target = args.target or (5 if args.pipeline else None)
+        if target:
+            checker.check_usernames_stream(usernames, target, found)
+        else:
+            checker.check_usernames_batch(list(usernames))
+        # 流水线模式下去重和无效用户名在遍历候选时才统计，因此在检查结束后汇总和写入
+        if username_filter:
+            username_filter.log_summary()
+        result_log.write_many(r for r in invalid if r.username not in checked)
+        result_log.close()
+        ResultHandler.save_and_show_results(result_log.path)
+        ResultHandler.save_metrics(result_log.path, args.prom_file)
         
     except KeyboardInterrupt:
         print("\n\n👋 收到退出信号，正在安全退出...")
+        if result_log:
+            print(f"💾 已检查的结果保存在 {result_log.path}，可使用 --resume 继续")
         sys.exit(0)
     except Exception as e:
         print(f"\n❌ 程序出错: {str(e)}")
         logging.error(f"程序出错: {str(e)}")
         sys.exit(1)
+    finally:
+        if result_log:
+            result_log.close()
+        if store:
+            store.close()
+
+def main():
+    """主函数，保留原有用法，等同于 python cli.py check ..."""
+    from cli import main as cli_main
+    sys.exit(cli_main(['check', *sys.argv[1:]]))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,192 @@
+import os
+import re
+import json
+import glob
+import logging
+import sys
+from datetime import datetime
+from typing import Iterator, Optional, Tuple
+
+from outcome import CheckResult, Outcome
+from result_store import ResultStore, ResultLog
+
+CHECK_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+_FILE_TIMESTAMP = re.compile(r'(\d{8}_\d{6})')
+_WHITESPACE = re.compile(r'\s*')
+_SEPARATORS = re.compile(r'[\s,]*')
+_TERMINATORS = frozenset(' \t\r\n,]')
+_MAX_TOKEN = 16  # 足以容纳 true/false/null 等被截断的字面量
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """流式解析 JSON 数组文件，逐个产出元素，不把整个文件读入内存
+
+    遇到无法解析的内容时停止并报告位置，已产出的记录不受影响。
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer, pos = '', 0
+        consumed = lines = 0  # 已丢弃的字符数和行数，用于报告出错位置
+        started = eof = False
+        while True:
+            if not started:
+                # 跳过开头的空白，第一个字符必须是数组开头
+                pos = _WHITESPACE.match(buffer, pos).end()
+                if pos < len(buffer):
+                    if buffer[pos] != '[':
+                        logging.warning(f"⚠️ {path} 不是 JSON 数组（第 {consumed + pos} 个字符为 {buffer[pos]!r}），跳过")
+                        return
+                    started = True
+                    pos += 1
+                    continue
+            else:
+                # 跳过空白和元素之间的逗号
+                pos = _SEPARATORS.match(buffer, pos).end()
+                if buffer.startswith(']', pos):
+                    return
+                if pos < len(buffer):
+                    try:
+                        item, end = decoder.raw_decode(buffer, pos)
+                    except json.JSONDecodeError as e:
+                        # 元素只是被缓冲区截断时，出错位置在缓冲区末尾的一个词法单元内（或是未闭合的字符串），
+                        # 读入更多数据即可；出错位置之后还有足够多的数据时说明内容本身有误，不再继续缓冲
+                        truncated = (len(buffer) - e.pos <= _MAX_TOKEN
+                                     or e.msg.startswith("Unterminated string"))
+                        if eof or not truncated:
+                            logging.warning(f"⚠️ {path} 第 {lines + e.lineno} 行（第 {consumed + e.pos} 个字符）"
+                                            f"无法解析: {e.msg}，已读取的记录仍会导入")
+                            return
+                    else:
+                        # 元素之后必须是空白、逗号或数组结尾；数字被缓冲区截断时（如 "12" 后面还有 "34"、
+                        # "2." 后面还有 "5"）只能解析出一部分，需要读入更多数据后重新解析
+                        if (end < len(buffer) and buffer[end] in _TERMINATORS) or (eof and end == len(buffer)):
+                            pos = end
+                            yield item
+                            continue
+                        if eof or len(buffer) - end > _MAX_TOKEN:
+                            logging.warning(f"⚠️ {path} 第 {lines + buffer.count(chr(10), 0, end) + 1} 行"
+                                            f"（第 {consumed + end} 个字符）无法解析: 元素之后缺少逗号，"
+                                            f"已读取的记录仍会导入")
+                            return
+            if eof:
+                if not started:
+                    logging.warning(f"⚠️ {path} 是空文件，跳过")
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            consumed += pos
+            lines += buffer.count('\n', 0, pos)
+            buffer, pos = buffer[pos:] + chunk, 0
+
+
+def _file_time(path: str) -> float:
+    """从文件名中的时间戳推断检查时间，没有则使用修改时间"""
+    match = _FILE_TIMESTAMP.search(os.path.basename(path))
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').timestamp()
+    return os.path.getmtime(path)
+
+
+def _record_row(record: dict, default_time: float) -> Tuple[CheckResult, float]:
+    try:
+        checked_at = datetime.strptime(record["check_time"], CHECK_TIME_FORMAT).timestamp()
+    except (KeyError, ValueError):
+        checked_at = default_time
+    return (CheckResult(record["username"], ResultLog.record_outcome(record), record.get("message", "")),
+            checked_at)
+
+
+class HistoryImporter:
+    """把 result/ 目录下历年的结果文件导入结果库的 latest 表
+
+    支持 results_*.json、results_*.jsonl 和 available_*.txt，
+    每个用户名只保留最近一次的结果；已导入且未变化的文件会被跳过，重复运行只处理新文件。
+    """
+    PATTERNS = ('results_*.json', 'results_*.jsonl', 'available_*.txt')
+
+    def __init__(self, store: ResultStore):
+        self.store = store
+
+    def import_directory(self, directory: str = 'result') -> Tuple[int, int]:
+        """导入目录下的结果文件，返回 (导入的文件数, 导入的记录数)"""
+        paths = sorted(p for pattern in self.PATTERNS
+                       for p in glob.glob(os.path.join(directory, pattern)))
+        files = records = 0
+        for path in paths:
+            count = self.import_file(path)
+            if count is not None:
+                files += 1
+                records += count
+        logging.info(f"📥 共导入 {files} 个新文件、{records} 条记录，跳过 {len(paths) - files} 个已导入的文件")
+        return files, records
+
+    def import_file(self, path: str) -> Optional[int]:
+        """导入单个文件，已导入且未变化时返回 None"""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        if self.store.is_imported(key, stat.st_size, stat.st_mtime):
+            return None
+        count = self.store.merge_latest(self._rows(path))
+        self.store.mark_imported(key, stat.st_size, stat.st_mtime, count)
+        logging.info(f"📄 {path}: {count} 条记录")
+        return count
+
+    @staticmethod
+    def _rows(path: str) -> Iterator[Tuple[CheckResult, float]]:
+        default_time = _file_time(path)
+        if path.endswith('.txt'):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    username = line.strip()
+                    if username:
+                        yield CheckResult(username, Outcome.AVAILABLE, "用户名可用"), default_time
+            return
+        records = ResultLog.iter_records(path) if path.endswith('.jsonl') else iter_json_array(path)
+        for record in records:
+            if isinstance(record, dict) and "username" in record:
+                result, checked_at = _record_row(record, default_time)
+                # 无效用户名是本地规则判断的，其规范化形式可能与合法用户名相同，不能覆盖真实的检查结果
+                if result.outcome is not Outcome.INVALID:
+                    yield result, checked_at
+
+
+def run_import(args) -> int:
+    """执行 import 子命令，参数定义见 cli.py"""
+    with ResultStore(args.db) as store:
+        HistoryImporter(store).import_directory(args.directory)
+    return 0
+
+
+def run_query(args) -> int:
+    """执行 query 子命令：只读结果库，不启动浏览器
+
+    给出用户名时逐个点查，有用户名没有记录时返回 1；
+    给出 --outcome 时列出该类型的用户名；都没有时按结果类型汇总。
+    """
+    if not os.path.exists(args.db):
+        print(f"❌ 结果数据库不存在: {args.db}", file=sys.stderr)
+        return 1
+    with ResultStore(args.db) as store:
+        if args.usernames:
+            missing = 0
+            for username in args.usernames:
+                hit = store.lookup(username)
+                if hit is None:
+                    missing += 1
+                    print(f"{'-':<10}{username:<32}{'-':<21}没有记录")
+                else:
+                    result, checked_at = hit
+                    print(f"{result.outcome.label:<10}{result.username:<32}"
+                          f"{datetime.fromtimestamp(checked_at).strftime(CHECK_TIME_FORMAT):<21}"
+                          f"{result.message}")
+            return 1 if missing else 0
+        if args.outcome:
+            outcomes = [Outcome.from_label(label) for label in args.outcome]
+            for result, _ in store.iter_latest(outcomes):
+                print(result.username)
+            return 0
+        counts = store.summary()
+        print(f"📊 共 {sum(counts.values())} 个用户名")
+        for outcome, count in counts.items():
+            print(f"- {outcome.label}: {count}")
+    return 0
@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from functools import wraps
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Prometheus 风格的直方图桶上界（秒）
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0, 60.0)
+
+# 计时类型：整个阶段、主动休眠、等待页面
+KIND_STAGE = "stage"
+KIND_SLEEP = "sleep"
+KIND_WAIT = "wait"
+
+
+class Histogram:
+    """固定桶直方图，只保存计数、总和和最值，内存占用与观测次数无关"""
+    __slots__ = ('counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """按桶估算分位数（桶内线性插值）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = BUCKETS[i - 1] if i > 0 else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else self.max
+                low, high = max(low, self.min), min(high, self.max)
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+            "min": round(self.min, 4) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 4),
+            "p95": round(self.quantile(0.95), 4),
+            "max": round(self.max, 4),
+        }
+
+
+class Metrics:
+    """按阶段统计耗时，区分阶段总耗时、主动休眠和等待页面的时间
+
+    span() 标记一个阶段，sleep() 和 wait() 记在当前阶段下，
+    运行结束后可导出 JSON 汇总和 Prometheus textfile。
+    """
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        # 需要原始耗时的使用方（如基准测试）可注册回调，逐条接收 (阶段, 类型, 秒数)
+        self.observers: List[Callable[[str, str, float], None]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def current_stage(self) -> str:
+        stack = self._stack()
+        return stack[-1] if stack else "other"
+
+    def observe(self, stage: str, kind: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get((stage, kind))
+            if histogram is None:
+                histogram = self.histograms[(stage, kind)] = Histogram()
+            histogram.observe(seconds)
+        for observer in self.observers:
+            observer(stage, kind, seconds)
+
+    @contextmanager
+    def span(self, stage: str):
+        """统计一个阶段的总耗时"""
+        stack = self._stack()
+        stack.append(stage)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, KIND_STAGE, time.perf_counter() - start)
+            stack.pop()
+
+    def timed(self, stage: str):
+        """装饰器形式的 span()"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def wait(self, label: Optional[str] = None):
+        """统计当前阶段内等待页面（选择器、导航、点击等）的耗时"""
+        stage = self.current_stage()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"{stage}.{label}" if label else stage, KIND_WAIT,
+                         time.perf_counter() - start)
+
+    def sleep(self, seconds: float, label: Optional[str] = None) -> None:
+        """time.sleep 的替代，休眠时间记在当前阶段下"""
+        stage = self.current_stage()
+        start = time.perf_counter()
+        time.sleep(seconds)
+        self.observe(f"{stage}.{label}" if label else stage, KIND_SLEEP,
+                     time.perf_counter() - start)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+
+    def summary(self) -> dict:
+        """汇总为 {阶段: {类型: 统计}}，并给出各类型的总耗时"""
+        stages: Dict[str, dict] = {}
+        totals = {KIND_SLEEP: 0.0, KIND_WAIT: 0.0}
+        with self._lock:
+            for (stage, kind), histogram in sorted(self.histograms.items()):
+                stages.setdefault(stage, {})[kind] = histogram.to_dict()
+                if kind in totals:
+                    totals[kind] += histogram.sum
+        return {
+            "totals": {f"{kind}_seconds": round(total, 4) for kind, total in totals.items()},
+            "stages": stages,
+        }
+
+    def log_summary(self) -> None:
+        totals = self.summary()["totals"]
+        logging.info(f"⏱️ 耗时分布: 主动休眠 {totals['sleep_seconds']:.1f} 秒, "
+                     f"等待页面 {totals['wait_seconds']:.1f} 秒")
+
+    def write_json(self, path: str) -> None:
+        _atomic_write(path, json.dumps(self.summary(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path: str, prefix: str = "gmailhunter") -> None:
+        """写出 Prometheus textfile collector 格式的直方图"""
+        name = f"{prefix}_stage_seconds"
+        lines = [f"# HELP {name} Time spent per checker stage, split by kind (stage/sleep/wait).",
+                 f"# TYPE {name} histogram"]
+        with self._lock:
+            for (stage, kind), histogram in sorted(self.histograms.items()):
+                labels = f'stage="{stage}",kind="{kind}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS, histogram.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        _atomic_write(path, "\n".join(lines) + "\n")
+
+
+def _atomic_write(path: str, content: str) -> None:
+    """先写临时文件再改名，避免采集方读到写了一半的文件"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+# 全局实例，注册流程和检查逻辑都记录到这里
+metrics = Metrics()
@@ -0,0 +1,202 @@
+import json
+import time
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional
+from urllib.parse import urlparse, parse_qs
+
+from username_utils import canonicalize_username
+
+# 各页面共用的外壳：语言选择器同样是 aria-live=polite，与真实页面一致
+_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head><meta charset="utf-8"><title>创建您的 Google 账号</title></head>
+<body>
+<div aria-live="polite">简体中文</div>
+{body}
+</body>
+</html>"""
+
+_NAME_STEP = """
+<h1>创建 Google 账号</h1>
+<input type="text" name="firstName" aria-label="名字">
+<input type="text" name="lastName" aria-label="姓氏">
+<button type="button" onclick="location.href='/signup/birthday'">下一步</button>
+"""
+
+_BIRTHDAY_STEP = """
+<h1>基本信息</h1>
+<input type="text" name="year" aria-label="年">
+<div role="combobox" tabindex="0" id="month" aria-expanded="false">月</div>
+<ul id="month-options" hidden>
+  <li role="option" data-value="1">1月</li><li role="option" data-value="2">2月</li>
+  <li role="option" data-value="3">3月</li>
+</ul>
+<input type="text" name="day" aria-label="日">
+<div role="combobox" tabindex="0" id="gender" aria-expanded="false">性别</div>
+<ul id="gender-options" hidden>
+  <li role="option">女</li><li role="option">男</li><li role="option">不愿透露</li>
+</ul>
+<button type="button" id="next">下一步</button>
+<script>
+function combobox(id) {
+  const box = document.getElementById(id);
+  const list = document.getElementById(id + '-options');
+  const options = Array.from(list.querySelectorAll('[role=option]'));
+  let active = -1;
+  const close = () => { list.hidden = true; box.setAttribute('aria-expanded', 'false'); };
+  const choose = (i) => { box.dataset.value = options[i].textContent; box.textContent = options[i].textContent; close(); };
+  box.addEventListener('click', () => { list.hidden = false; box.setAttribute('aria-expanded', 'true'); });
+  options.forEach((o, i) => o.addEventListener('click', () => choose(i)));
+  box.addEventListener('keydown', (e) => {
+    if (list.hidden) return;
+    if (e.key === 'ArrowDown') { active = Math.min(active + 1, options.length - 1); e.preventDefault(); }
+    if (e.key === 'Enter' && active >= 0) { choose(active); e.preventDefault(); }
+  });
+}
+combobox('month');
+combobox('gender');
+document.getElementById('next').addEventListener('click', () => { location.href = '/signup/username'; });
+</script>
+"""
+
+_USERNAME_STEP = """
+<h1>如何登录</h1>
+<input type="text" name="Username" aria-label="用户名">
+<div aria-live="polite" id="error"></div>
+<button type="button" id="next">下一步</button>
+<script>
+document.getElementById('next').addEventListener('click', async () => {
+  const name = document.querySelector("input[name='Username']").value;
+  const error = document.getElementById('error');
+  error.textContent = '';
+  const resp = await fetch('/api/check?username=' + encodeURIComponent(name));
+  const data = await resp.json();
+  if (data.available) {
+    location.href = '/signup/password';
+  } else {
+    error.textContent = data.message;
+  }
+});
+</script>
+"""
+
+_PASSWORD_STEP = """
+<h1>设置一个安全的密码</h1>
+<input type="password" name="Passwd" aria-label="密码">
+<input type="password" name="PasswdAgain" aria-label="确认">
+<button type="button">下一步</button>
+"""
+
+TAKEN_MESSAGE = "该用户名已被使用。请换一个用户名试试。"
+
+
+class MockSignupServer:
+    """本地模拟 Gmail 注册流程的 HTTP 服务，用于离线基准测试
+
+    页面结构（输入框名称、combobox、aria-live 错误提示、密码页）与真实注册页一致，
+    可配置页面延迟、用户名检查延迟和已被占用的用户名列表。
+    """
+    PAGES = {
+        '/signup': _NAME_STEP,
+        '/signup/birthday': _BIRTHDAY_STEP,
+        '/signup/username': _USERNAME_STEP,
+        '/signup/password': _PASSWORD_STEP,
+    }
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, page_latency: float = 0.0,
+                 check_latency: float = 0.0, taken: Optional[Iterable[str]] = None):
+        self.page_latency = page_latency
+        self.check_latency = check_latency
+        self.taken = {canonicalize_username(u) for u in (taken or [])}
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def signup_url(self) -> str:
+        return f"{self.url}/signup"
+
+    def start(self) -> 'MockSignupServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        logging.info(f"🧪 模拟注册页已启动: {self.signup_url}")
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == '/api/check':
+                    time.sleep(server.check_latency)
+                    username = parse_qs(parsed.query).get('username', [''])[0]
+                    self._send(json.dumps(server.check(username), ensure_ascii=False),
+                               'application/json')
+                elif parsed.path in server.PAGES:
+                    time.sleep(server.page_latency)
+                    self._send(_PAGE.format(body=server.PAGES[parsed.path]), 'text/html')
+                else:
+                    self.send_error(404)
+
+            def _send(self, body: str, content_type: str):
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def check(self, username: str) -> dict:
+        """模拟服务端的用户名检查"""
+        name = canonicalize_username(username)
+        if not 6 <= len(name) <= 30:
+            return {"available": False, "message": "用户名长度必须介于 6 到 30 个字符之间。"}
+        if name in self.taken:
+            return {"available": False, "message": TAKEN_MESSAGE}
+        return {"available": True, "message": ""}
+
+
+def main():
+    """单独启动模拟注册页，便于手动调试"""
+    parser = argparse.ArgumentParser(description='本地模拟 Gmail 注册页')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口 (默认: 8765)')
+    parser.add_argument('--page-latency', type=float, default=0.0, help='每个页面的服务端延迟（秒）')
+    parser.add_argument('--check-latency', type=float, default=0.0, help='用户名检查的服务端延迟（秒）')
+    parser.add_argument('--taken', nargs='*', default=[], help='视为已被占用的用户名')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    server = MockSignupServer(port=args.port, page_latency=args.page_latency,
+                              check_latency=args.check_latency, taken=args.taken)
+    print(f"🧪 模拟注册页: {server.signup_url} (Ctrl-C 退出)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
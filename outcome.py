@@ -0,0 +1,167 @@
+import re
+from array import array
+from enum import IntEnum
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+class Outcome(IntEnum):
+    """用户名检查结果的类型，数值用于紧凑存储（数据库、数组）"""
+    AVAILABLE = 0
+    TAKEN = 1
+    INVALID = 2
+    UNKNOWN = 3
+    ERROR = 4
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+    @property
+    def retryable(self) -> bool:
+        """页面状态异常或出错的结果，值得重新检查"""
+        return self in (Outcome.UNKNOWN, Outcome.ERROR)
+
+    @classmethod
+    def from_label(cls, label: str) -> 'Outcome':
+        return cls[label.upper()]
+
+    @classmethod
+    def from_legacy(cls, available: bool, message: str) -> 'Outcome':
+        """从旧格式的 (available, message) 推断结果类型，用于迁移历史数据"""
+        if available:
+            return cls.AVAILABLE
+        if message.startswith(LEGACY_INVALID_PREFIX):
+            return cls.INVALID
+        if message in LEGACY_UNKNOWN_MESSAGES:
+            return cls.UNKNOWN
+        if _LEGACY_ERROR.search(message):
+            return cls.ERROR
+        return cls.TAKEN
+
+
+RETRYABLE_OUTCOMES = tuple(o for o in Outcome if o.retryable)
+
+# 旧版本写入的消息文本，仅用于迁移历史结果
+LEGACY_INVALID_PREFIX = "无效用户名"
+LEGACY_UNKNOWN_MESSAGES = ("状态未知", "无法找到用户名输入框", "检查失败")
+_LEGACY_ERROR = re.compile(r"Error|Exception|Timeout|timeout|Target .*closed|net::|exceeded")
+
+
+class CheckResult:
+    """单个用户名的检查结果"""
+    __slots__ = ('username', 'outcome', 'message')
+
+    def __init__(self, username: str, outcome: Outcome, message: str = ""):
+        self.username = username
+        self.outcome = outcome
+        self.message = message
+
+    @property
+    def available(self) -> bool:
+        return self.outcome is Outcome.AVAILABLE
+
+    def __eq__(self, other):
+        return (isinstance(other, CheckResult) and self.username == other.username
+                and self.outcome == other.outcome and self.message == other.message)
+
+    def __repr__(self):
+        return f"CheckResult({self.username!r}, {self.outcome.label}, {self.message!r})"
+
+
+class ResultSet:
+    """按列存储的检查结果集合：结果类型存于字节数组，按类型筛选无需解析消息文本"""
+    def __init__(self, results: Iterable[CheckResult] = ()):
+        self.usernames: List[str] = []
+        self.outcomes = array('B')
+        self.messages: List[str] = []
+        self.extend(results)
+
+    def append(self, result: CheckResult) -> None:
+        self.usernames.append(result.username)
+        self.outcomes.append(result.outcome)
+        self.messages.append(result.message)
+
+    def extend(self, results: Iterable[CheckResult]) -> None:
+        for result in results:
+            self.append(result)
+
+    def __len__(self) -> int:
+        return len(self.usernames)
+
+    def __getitem__(self, index: int) -> CheckResult:
+        return CheckResult(self.usernames[index], Outcome(self.outcomes[index]), self.messages[index])
+
+    def __iter__(self) -> Iterator[CheckResult]:
+        for username, outcome, message in zip(self.usernames, self.outcomes, self.messages):
+            yield CheckResult(username, Outcome(outcome), message)
+
+    def usernames_with(self, *outcomes: Outcome) -> List[str]:
+        """筛选出指定结果类型的用户名"""
+        wanted = set(int(o) for o in outcomes)
+        return [u for u, o in zip(self.usernames, self.outcomes) if o in wanted]
+
+    def available(self) -> List[str]:
+        return self.usernames_with(Outcome.AVAILABLE)
+
+    def retryable(self) -> List[str]:
+        """需要重新检查的用户名"""
+        return self.usernames_with(*RETRYABLE_OUTCOMES)
+
+    def counts(self) -> dict:
+        """各结果类型的数量"""
+        counts = {o: 0 for o in Outcome}
+        for code in self.outcomes:
+            counts[Outcome(code)] += 1
+        return counts
+
+
+class OutcomeClassifier:
+    """根据页面结构判断检查结果，不依赖页面语言的文案
+
+    - 跳转到密码页面：可用
+    - 点击下一步后 aria-live 区域出现了提交前没有的文本，或提交后重新渲染出了此前已确认过的拒绝提示：
+      已被占用（不合规的用户名已在本地过滤，这里的拒绝都视为被占用）
+    - 其余情况：状态未知
+
+    语言选择、字数统计等提交前就存在的固定文本不会被当成错误信息；
+    提交后没有变化的旧提示也不算数，页面没有响应时返回状态未知，稍后会重新检查。
+    """
+    LIVE_REGION = "div[aria-live='polite']"
+    PASSWORD = "input[type='password']"
+    # 提交前在每个 aria-live 区域上挂 MutationObserver，提交后据此判断区域是否被清空或重新渲染
+    WATCH_SCRIPT = """els => els.map(el => {
+        el.__hunterChanged = false;
+        if (!el.__hunterObserver) {
+            el.__hunterObserver = new MutationObserver(() => { el.__hunterChanged = true; });
+            el.__hunterObserver.observe(el, {childList: true, subtree: true, characterData: true});
+        }
+        return el.textContent.trim();
+    })"""
+    # 提交后才出现的区域没有挂过观察器，同样视为发生了变化
+    READ_SCRIPT = "els => els.map(el => [el.textContent.trim(), !el.__hunterObserver || el.__hunterChanged])"
+
+    def __init__(self):
+        # 已确认过的拒绝提示；连续多个用户名被占用时提示文本不变，需要据此识别
+        self.known_rejections = set()
+
+    def snapshot(self, page) -> List[str]:
+        """记录提交前 aria-live 区域的文本，并开始观察这些区域的变化"""
+        return page.locator(self.LIVE_REGION).evaluate_all(self.WATCH_SCRIPT)
+
+    def classify(self, page, username: str, before: List[str]) -> CheckResult:
+        if page.locator(self.PASSWORD).count() > 0:
+            return CheckResult(username, Outcome.AVAILABLE, "用户名可用")
+        after = page.locator(self.LIVE_REGION).evaluate_all(self.READ_SCRIPT)
+        message = self._rejection(before, after)
+        if message:
+            self.known_rejections.add(message)
+            return CheckResult(username, Outcome.TAKEN, message)
+        return CheckResult(username, Outcome.UNKNOWN, "状态未知")
+
+    def _rejection(self, before: List[str], after: List[Tuple[str, bool]]) -> Optional[str]:
+        """找出提交后的拒绝提示文本，after 为 (文本, 提交后是否变化过)"""
+        previous = set(before)
+        for text, changed in after:
+            if text and (text not in previous or (changed and text in self.known_rejections)):
+                return text
+        return None
@@ -0,0 +1,359 @@
+import os
+import glob
+import json
+import sqlite3
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from username_utils import canonicalize_username
+from outcome import CheckResult, Outcome, RETRYABLE_OUTCOMES
+from config import DEFAULT_DB_PATH, DEFAULT_TTL_HOURS
+
+
+class ResultStore:
+    """检查结果的本地持久化存储 (SQLite)
+
+    每条检查结果都会按时间戳记录下来，并以规范化后的用户名建立索引，
+    批量检查前可据此跳过在 TTL 内已经检查过的用户名。
+    结果类型 (Outcome) 以整数存储，状态未知或出错的结果不算新鲜结果，会被重新检查。
+
+    results 表保存完整历史；latest 表每个用户名只保留最近一条结果，
+    用于点查、汇总以及导入历史结果文件。
+    """
+    LATEST_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS latest (
+            normalized TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            outcome INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            checked_at REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_latest_outcome ON latest (outcome);
+        CREATE TABLE IF NOT EXISTS imported_files (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            records INTEGER NOT NULL
+        );
+    """
+    UPSERT_LATEST = """
+        INSERT INTO latest (normalized, username, outcome, message, checked_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (normalized) DO UPDATE SET
+            username = excluded.username, outcome = excluded.outcome,
+            message = excluded.message, checked_at = excluded.checked_at
+        WHERE excluded.checked_at >= latest.checked_at
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            normalized TEXT NOT NULL,
+            available INTEGER NOT NULL,
+            outcome INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            checked_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_normalized
+            ON results (normalized, checked_at);
+        CREATE INDEX IF NOT EXISTS idx_results_outcome ON results (outcome);
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """创建结果库，或升级旧版本的结果库"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(results)")}
+        if columns and 'outcome' not in columns:
+            # 旧版本没有 outcome 列，添加后根据 available/message 回填
+            logging.info("🔄 正在升级结果库，添加结果类型...")
+            self.conn.create_function(
+                "legacy_outcome", 2,
+                lambda available, message: int(Outcome.from_legacy(bool(available), message)))
+            with self.conn:
+                self.conn.execute("ALTER TABLE results ADD COLUMN outcome INTEGER")
+                self.conn.execute("UPDATE results SET outcome = legacy_outcome(available, message)")
+        # 旧库需先添加 outcome 列，SCHEMA 中 outcome 列上的索引才能创建
+        self.conn.executescript(self.SCHEMA)
+        has_latest = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'latest'").fetchone()
+        if not has_latest:
+            # latest 表由历史记录生成，SQLite 中与 MAX() 同时查询的裸列取自最大值所在的行
+            with self.conn:
+                self.conn.executescript(self.LATEST_SCHEMA)
+                self.conn.execute(
+                    "INSERT INTO latest (normalized, username, outcome, message, checked_at) "
+                    "SELECT normalized, username, outcome, message, MAX(checked_at) "
+                    "FROM results GROUP BY normalized")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def record(self, result: CheckResult, checked_at: Optional[float] = None) -> None:
+        """记录一条检查结果"""
+        self.record_many([result], checked_at)
+
+    def record_many(self, results: Iterable[CheckResult],
+                    checked_at: Optional[float] = None) -> None:
+        """批量记录检查结果"""
+        now = time.time() if checked_at is None else checked_at
+        rows = [(r.username, canonicalize_username(r.username), int(r.available), int(r.outcome),
+                 r.message, now) for r in results]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO results (username, normalized, available, outcome, message, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.conn.executemany(
+                self.UPSERT_LATEST,
+                [(normalized, username, outcome, message, checked)
+                 for username, normalized, _, outcome, message, checked in rows])
+
+    def merge_latest(self, rows: Iterable[Tuple[CheckResult, float]]) -> int:
+        """把 (结果, 检查时间) 合并进 latest 表，只在比已有结果更新时覆盖，返回处理的条数"""
+        count = 0
+
+        def params():
+            nonlocal count
+            for result, checked_at in rows:
+                count += 1
+                yield (canonicalize_username(result.username), result.username, int(result.outcome),
+                       result.message, checked_at)
+
+        with self.conn:
+            self.conn.executemany(self.UPSERT_LATEST, params())
+        return count
+
+    def fresh_result(self, username: str,
+                     ttl_hours: float = DEFAULT_TTL_HOURS) -> Optional[CheckResult]:
+        """查询单个用户名在 TTL 内的最近结果，没有则返回 None"""
+        return self.fresh_results([username], ttl_hours).get(canonicalize_username(username))
+
+    def fresh_results(self, usernames: Iterable[str],
+                      ttl_hours: float = DEFAULT_TTL_HOURS) -> Dict[str, CheckResult]:
+        """查询 TTL 内仍然有效的结果，返回 {规范化用户名: 最近结果}
+
+        状态未知或出错的结果不计入，这些用户名会被重新检查。
+        """
+        cutoff = time.time() - ttl_hours * 3600
+        keys = list(dict.fromkeys(canonicalize_username(u) for u in usernames))
+        retryable = tuple(int(o) for o in RETRYABLE_OUTCOMES)
+        found = {}
+        # SQLite 单条语句的参数数量有限，分块查询
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT normalized, username, outcome, message FROM results "
+                f"WHERE normalized IN ({placeholders}) AND checked_at >= ? "
+                f"AND outcome NOT IN ({','.join('?' * len(retryable))}) "
+                f"ORDER BY checked_at, id",
+                (*chunk, cutoff, *retryable)
+            )
+            # 按时间升序遍历，后出现的覆盖先出现的，即保留最新结果
+            for normalized, username, outcome, message in rows:
+                found[normalized] = CheckResult(username, Outcome(outcome), message)
+        return found
+
+    def partition(self, usernames: List[str],
+                  ttl_hours: float = DEFAULT_TTL_HOURS) -> Tuple[List[str], List[CheckResult]]:
+        """将用户名分为需要检查的和已有新鲜结果的两部分"""
+        fresh = self.fresh_results(usernames, ttl_hours)
+        pending, cached = [], []
+        for username in usernames:
+            hit = fresh.get(canonicalize_username(username))
+            if hit is None:
+                pending.append(username)
+            else:
+                cached.append(CheckResult(username, hit.outcome, hit.message))
+        if cached:
+            logging.info(f"💾 {len(cached)} 个用户名在 {ttl_hours:g} 小时内已检查过，直接使用历史结果")
+        return pending, cached
+
+    def lookup(self, username: str) -> Optional[Tuple[CheckResult, float]]:
+        """点查某个用户名最近一次的结果（含导入的历史结果）"""
+        row = self.conn.execute(
+            "SELECT username, outcome, message, checked_at FROM latest WHERE normalized = ?",
+            (canonicalize_username(username),)).fetchone()
+        if row is None:
+            return None
+        return CheckResult(row[0], Outcome(row[1]), row[2]), row[3]
+
+    def iter_latest(self, outcomes: Optional[Iterable[Outcome]] = None) -> Iterator[Tuple[CheckResult, float]]:
+        """逐个产出每个用户名最近一次的结果，可按结果类型筛选（如重新排队需要重试的用户名）"""
+        query = "SELECT username, outcome, message, checked_at FROM latest"
+        params: tuple = ()
+        if outcomes is not None:
+            params = tuple(int(o) for o in outcomes)
+            query += f" WHERE outcome IN ({','.join('?' * len(params))})"
+        for username, outcome, message, checked_at in self.conn.execute(query + " ORDER BY normalized", params):
+            yield CheckResult(username, Outcome(outcome), message), checked_at
+
+    def summary(self) -> Dict[Outcome, int]:
+        """按结果类型统计用户名数量（每个用户名只计最近一次结果）"""
+        counts = {o: 0 for o in Outcome}
+        for outcome, count in self.conn.execute("SELECT outcome, COUNT(*) FROM latest GROUP BY outcome"):
+            counts[Outcome(outcome)] = count
+        return counts
+
+    def is_imported(self, path: str, size: int, mtime: float) -> bool:
+        row = self.conn.execute("SELECT size, mtime FROM imported_files WHERE path = ?", (path,)).fetchone()
+        return row is not None and row[0] == size and row[1] == mtime
+
+    def mark_imported(self, path: str, size: int, mtime: float, records: int) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO imported_files (path, size, mtime, records) VALUES (?, ?, ?, ?)",
+                (path, size, mtime, records))
+
+
+class ResultLog:
+    """追加写入的 JSONL 结果日志
+
+    每条结果产生后立即追加一行并 flush，按条数/时间批量 fsync，
+    程序崩溃或中断时已写入的结果不会丢失，可通过 --resume 继续。
+    """
+    def __init__(self, path: str, fsync_every: int = 20, fsync_interval: float = 5.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._repair_tail()
+        self.file = open(path, 'a', encoding='utf-8')
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    @staticmethod
+    def new_path(directory: str = 'result') -> str:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return os.path.join(directory, f"results_{timestamp}.jsonl")
+
+    @staticmethod
+    def latest_path(directory: str = 'result') -> Optional[str]:
+        """查找最近一次运行的结果日志"""
+        paths = glob.glob(os.path.join(directory, 'results_*.jsonl'))
+        return max(paths, key=os.path.getmtime) if paths else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _repair_tail(self) -> None:
+        """崩溃可能留下不完整的最后一行，补上换行使后续追加的记录保持独立"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+    @staticmethod
+    def _line(result: CheckResult, check_time: str) -> str:
+        return json.dumps({
+            "username": result.username,
+            "available": result.available,
+            "outcome": result.outcome.label,
+            "message": result.message,
+            "check_time": check_time
+        }, ensure_ascii=False) + "\n"
+
+    def write(self, result: CheckResult) -> None:
+        """追加一条检查结果"""
+        self.file.write(self._line(result, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        self.file.flush()
+        self._pending += 1
+        if (self._pending >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+
+    def write_many(self, results: Iterable[CheckResult]) -> None:
+        """批量追加结果（缓存命中、本地判为无效等），全部写完后只 fsync 一次"""
+        check_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        write = self.file.write
+        for result in results:
+            write(self._line(result, check_time))
+        self.sync()
+
+    def sync(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+    @staticmethod
+    def iter_records(path: str, quiet: bool = False) -> Iterator[dict]:
+        """逐行读取结果日志，跳过崩溃时写坏的行"""
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    if not quiet:
+                        logging.warning(f"⚠️ 跳过损坏的结果行: {line[:50]}")
+
+    @staticmethod
+    def iter_final_records(path: str) -> Iterator[dict]:
+        """按日志顺序逐个产出每个用户名的最后一条记录
+
+        --resume 会重新检查状态未知或出错的用户名并追加新记录，旧记录被后面的记录取代。
+        先扫描一遍记下每个用户名最后出现的位置，内存只与用户名数量有关。
+        """
+        last = {}
+        for i, record in enumerate(ResultLog.iter_records(path, quiet=True)):
+            last[ResultLog.record_key(record)] = i
+        for i, record in enumerate(ResultLog.iter_records(path)):
+            if last[ResultLog.record_key(record)] == i:
+                yield record
+
+    @staticmethod
+    def record_outcome(record: dict) -> Outcome:
+        """读取一条日志记录的结果类型，兼容没有 outcome 字段的旧日志"""
+        if "outcome" in record:
+            return Outcome.from_label(record["outcome"])
+        return Outcome.from_legacy(record["available"], record["message"])
+
+    @staticmethod
+    def record_key(record: dict) -> str:
+        """日志记录对应的用户名键：合法用户名取规范化形式
+
+        无效用户名保留原写法，否则 a..bcdef 这样的无效写法会与合法的 abcdef 混为一谈。
+        """
+        if ResultLog.record_outcome(record) is Outcome.INVALID:
+            return record["username"]
+        return canonicalize_username(record["username"])
+
+    def checked_usernames(self) -> Set[str]:
+        """返回日志中已有确定结果的用户名键（见 record_key），状态未知或出错的不计入"""
+        self.file.flush()
+        return {self.record_key(r) for r in self.iter_records(self.path)
+                if not self.record_outcome(r).retryable}
+
+    def available_count(self) -> int:
+        """返回日志中可用的用户名数量，--resume 时用于接着计算流水线的目标"""
+        self.file.flush()
+        return len({self.record_key(r) for r in self.iter_records(self.path, quiet=True)
+                    if self.record_outcome(r) is Outcome.AVAILABLE})
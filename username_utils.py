@@ -0,0 +1,114 @@
+import re
+import logging
+from typing import Iterable, Iterator, List, Optional, Tuple
+from outcome import CheckResult, Outcome
+
+GMAIL_DOMAINS = ('@gmail.com', '@googlemail.com')
+
+# Gmail 用户名规则
+MIN_LENGTH = 6
+MAX_LENGTH = 30
+RESERVED_PREFIXES = ('google', 'gmail', 'googlemail', 'abuse', 'postmaster')
+INVALID_PREFIX = "无效用户名"
+
+_ALLOWED_CHARS = re.compile(r'[a-z0-9.]*')
+# 首尾为字母或数字，中间不允许连续的点号
+_VALID_SHAPE = re.compile(r'[a-z0-9](?:\.?[a-z0-9])*')
+_HAS_LETTER = re.compile(r'[a-z]')
+
+
+def _strip_domain(name: str) -> str:
+    for domain in GMAIL_DOMAINS:
+        if name.endswith(domain):
+            return name[:-len(domain)]
+    return name
+
+
+def canonicalize_username(username: str) -> str:
+    """按 Gmail 规则规范化用户名：去空白、转小写、去掉点号和 Gmail 域名后缀
+
+    Gmail 忽略大小写和点号，a.bc、ABC 和 abc 是同一个地址。
+    """
+    return _strip_domain(username.strip().lower()).replace('.', '')
+
+
+def validate_username(name: str) -> Optional[str]:
+    """按 Google 公布的规则校验用户名，合法返回 None，否则返回原因
+
+    name 应为已去空白、转小写并去掉域名后缀、但保留点号的形式。
+    """
+    canonical = name.replace('.', '')
+    if not _ALLOWED_CHARS.fullmatch(name):
+        return "只能使用字母 (a-z)、数字 (0-9) 和点号 (.)"
+    if not MIN_LENGTH <= len(canonical) <= MAX_LENGTH:
+        return f"长度必须在 {MIN_LENGTH} 到 {MAX_LENGTH} 个字符之间"
+    if not _VALID_SHAPE.fullmatch(name):
+        return "首尾必须是字母或数字，且不能包含连续的点号"
+    if len(canonical) >= 8 and not _HAS_LETTER.search(canonical):
+        return "8 个字符及以上的用户名必须至少包含一个字母"
+    if canonical.startswith(RESERVED_PREFIXES):
+        return "不能使用保留前缀"
+    return None
+
+
+class UsernameFilter:
+    """单次遍历完成用户名的校验、规范化与去重
+
+    不符合规则的用户名在本地直接判为无效，不会交给浏览器检查；
+    合法的用户名规范化后去重，并统计被合并的数量。
+    """
+    def __init__(self, validate: bool = True):
+        self.validate = validate
+        self.seen = set()
+        self.invalid_seen = set()
+        self.invalid: List[CheckResult] = []
+        self.total = 0
+        self.collapsed = 0
+
+    def feed(self, usernames: Iterable[str]) -> Iterator[str]:
+        """逐个产出首次出现的合法规范化用户名，跳过空行"""
+        seen = self.seen
+        invalid_seen = self.invalid_seen
+        validate = self.validate
+        for raw in usernames:
+            name = _strip_domain(raw.strip().lower())
+            if not name:
+                continue
+            self.total += 1
+            # 先校验再去重，避免无效写法（如 abc.def.）把合法的等价写法挤掉
+            if validate:
+                reason = validate_username(name)
+                if reason:
+                    if name in invalid_seen:
+                        self.collapsed += 1
+                    else:
+                        invalid_seen.add(name)
+                        self.invalid.append(CheckResult(name, Outcome.INVALID, f"{INVALID_PREFIX}: {reason}"))
+                    continue
+            canonical = name.replace('.', '')
+            if canonical in seen:
+                self.collapsed += 1
+                continue
+            seen.add(canonical)
+            yield canonical
+
+    def log_summary(self) -> None:
+        if self.collapsed:
+            logging.info(f"🧹 共读取 {self.total} 个用户名，合并重复/等价写法 {self.collapsed} 个，"
+                         f"剩余 {self.total - self.collapsed - len(self.invalid)} 个待检查")
+        if self.invalid:
+            logging.info(f"🚫 {len(self.invalid)} 个用户名不符合 Gmail 规则，已在本地判为无效")
+
+
+def filter_usernames(usernames: Iterable[str]) -> Tuple[List[str], List[CheckResult]]:
+    """校验、规范化并去重用户名，返回 (待检查的用户名, 无效用户名的结果)"""
+    username_filter = UsernameFilter()
+    result = list(username_filter.feed(usernames))
+    username_filter.log_summary()
+    return result, username_filter.invalid
+
+
+def load_usernames(filepath: str) -> Tuple[List[str], List[CheckResult]]:
+    """从文件读取用户名（每行一个），返回 (待检查的用户名, 无效用户名的结果)"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return filter_usernames(f)